@@ -0,0 +1,243 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from urllib.parse import urlparse
+
+from fetcher import fetch_all
+from rate_limit import rate_limiter
+
+ARXIV_API = "http://export.arxiv.org/api/query"
+
+# New-style (2107.05580, optionally versioned) and old-style (hep-th/9901001) identifiers
+ARXIV_ID_RE = re.compile(r"^(?:\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?$")
+
+
+def is_arxiv_id(text: str) -> bool:
+    return bool(ARXIV_ID_RE.match(text.strip()))
+
+
+def _strip_version(paper_id: str) -> str:
+    return re.sub(r"v\d+$", "", paper_id.strip())
+
+
+def _search_key(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class ArxivClient:
+    """Shared arXiv client with a persisted paper index
+
+    Every paper seen is stored in SQLite by id with its metadata and full
+    abstract, and each query remembers its ranked ids for search_ttl seconds,
+    so repeated searches and id lookups need no network. API requests share
+    the arXiv domain's token bucket in rate_limit, which starts at most one
+    request every min_interval seconds (arXiv's published limit is one every
+    3 seconds); several queries still overlap their response time.
+    """
+
+    def __init__(
+        self,
+        path: str = ".arxiv_index.sqlite",
+        search_ttl: float = 24 * 3600,
+        min_interval: float = 3.0,
+        min_fetch: int = 10,
+    ):
+        self.path = path
+        self.search_ttl = search_ttl
+        self.min_fetch = min_fetch
+        self.min_interval = min_interval
+        # Every arXiv API request in the process shares this domain's token bucket
+        rate_limiter.configure(urlparse(ARXIV_API).netloc, rate=1 / min_interval if min_interval else None, burst=1)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._in_flight = {}
+        self._counters = {"hits": 0, "misses": 0, "papers_fetched": 0}
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._open_lock = threading.Lock()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the module creates no files
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS papers ("
+                        " id TEXT PRIMARY KEY, title TEXT, authors TEXT, summary TEXT, pdf_url TEXT, published TEXT,"
+                        " fetched_at REAL)"
+                    )
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS searches ("
+                        " key TEXT PRIMARY KEY, fetch_size INTEGER, ids TEXT, created_at REAL)"
+                    )
+                    conn.commit()
+                    self._connection = conn
+        return self._connection
+
+    # Network
+    def _client(self):
+        # arxiv.Client keeps per-instance request state, so each worker thread gets its own
+        if not hasattr(self._local, "client"):
+            import arxiv
+            self._local.client = arxiv.Client(
+                page_size=100, delay_seconds=self.min_interval, num_retries=3
+            )
+        return self._local.client
+
+    def _run(self, **search_args) -> List[Dict]:
+        import arxiv
+
+        rate_limiter.acquire(ARXIV_API)
+        search = arxiv.Search(sort_by=arxiv.SortCriterion.Relevance, **search_args)
+        papers = []
+        for result in self._client().results(search):
+            papers.append({
+                "id": _strip_version(result.get_short_id()),
+                "title": result.title,
+                "authors": [author.name for author in result.authors],
+                "summary": result.summary,
+                "pdf_url": result.pdf_url,
+                "published": result.published.strftime("%Y-%m-%d"),
+            })
+        with self._lock:
+            self._counters["papers_fetched"] += len(papers)
+        self._store_papers(papers)
+        return papers
+
+    # Index
+    def _store_papers(self, papers: List[Dict]):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO papers (id, title, authors, summary, pdf_url, published, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (p["id"], p["title"], json.dumps(p["authors"]), p["summary"], p["pdf_url"], p["published"], now)
+                    for p in papers
+                ],
+            )
+            self._conn.commit()
+
+    def _load_papers(self, ids: List[str]) -> Dict[str, Dict]:
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, title, authors, summary, pdf_url, published FROM papers"
+                f" WHERE id IN ({','.join('?' * len(ids))})",
+                ids,
+            ).fetchall()
+        return {
+            row[0]: {
+                "id": row[0],
+                "title": row[1],
+                "authors": json.loads(row[2]),
+                "summary": row[3],
+                "pdf_url": row[4],
+                "published": row[5],
+            }
+            for row in rows
+        }
+
+    def _cached_search(self, key: str, fetch_size: int) -> Optional[List[Dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetch_size, ids FROM searches WHERE key = ? AND created_at >= ?",
+                (key, time.time() - self.search_ttl),
+            ).fetchone()
+        if row is None or row[0] < fetch_size:
+            return None
+        ids = json.loads(row[1])
+        papers = self._load_papers(ids)
+        if len(papers) != len(ids):
+            return None
+        return [papers[paper_id] for paper_id in ids]
+
+    # Public API
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """Top max_results papers for query, each a dict with id, title, authors, summary, pdf_url and published"""
+        key = _search_key(query)
+        # Fetch a few extra so smaller follow-up requests are index hits
+        fetch_size = max(max_results, self.min_fetch)
+
+        papers = self._cached_search(key, fetch_size)
+        if papers is not None:
+            with self._lock:
+                self._counters["hits"] += 1
+            return papers[:max_results]
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self._counters["misses"] += 1
+            else:
+                self._counters["hits"] += 1
+
+        if not owner:
+            return future.result()[:max_results]
+
+        try:
+            papers = self._run(query=query, max_results=fetch_size)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO searches (key, fetch_size, ids, created_at) VALUES (?, ?, ?, ?)",
+                    (key, fetch_size, json.dumps([p["id"] for p in papers]), time.time()),
+                )
+                self._conn.commit()
+            future.set_result(papers)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+        return papers[:max_results]
+
+    def search_many(
+        self, queries: Iterable[str], max_results: int = 5, timeout: float = 60
+    ) -> List[Tuple[str, Optional[List[Dict]], Optional[str]]]:
+        """Run several queries concurrently, returns (query, papers, error) tuples in input order"""
+        queries = list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+        return fetch_all(
+            queries,
+            lambda query: self.search(query, max_results),
+            max_workers=len(queries) or 1,
+            timeout=timeout,
+        )
+
+    def get_papers(self, ids: Iterable[str]) -> Dict[str, Dict]:
+        """Papers by arXiv id from the index, with every missing id fetched in one batched request"""
+        ids = list(dict.fromkeys(_strip_version(i) for i in ids))
+        papers = self._load_papers(ids)
+        missing = [paper_id for paper_id in ids if paper_id not in papers]
+        with self._lock:
+            self._counters["hits"] += len(ids) - len(missing)
+            self._counters["misses"] += len(missing)
+        if missing:
+            for paper in self._run(id_list=missing, max_results=len(missing)):
+                papers[paper["id"]] = paper
+        return {paper_id: papers[paper_id] for paper_id in ids if paper_id in papers}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["indexed_papers"] = self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+        return counters
+
+
+arxiv_client = ArxivClient(
+    os.getenv("ARXIV_INDEX_PATH", ".arxiv_index.sqlite"),
+    search_ttl=float(os.getenv("ARXIV_SEARCH_TTL", 24 * 3600)),
+)
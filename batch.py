@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import json
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from main import export_trace, extract_output_text, get_agent_executor, get_llm
+from prefetcher import prefetcher
+from query_cache import query_cache
+from structured_output import finalize_research
+from tracing import start_trace
+from tracing_callbacks import TracingCallbackHandler
+
+
+def read_queries(path: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """Yield (query, error) pairs from a JSONL file (or "-" for stdin), one line at a time
+
+    Each line is either {"query": "..."} or a bare JSON string; plain text lines
+    are accepted as-is so a simple list of topics also works. A line that can't
+    be used yields the line itself and an error instead of ending the batch.
+    """
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line_number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield line, None
+                continue
+            if not isinstance(record, dict):
+                yield str(record), None
+            elif isinstance(record.get("query"), str) and record["query"].strip():
+                yield record["query"], None
+            else:
+                yield line, f"Line {line_number} has no \"query\" string"
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+async def research_one(query: str, semaphore: asyncio.Semaphore) -> dict:
+    """Run one query through the agent and return a JSONL record for it"""
+    async with semaphore:
+        start_time = time.time()
+
+        # Each task runs in its own context, so every query gets a separate trace
+        tracer = start_trace()
+        try:
+            # A busy cache database fails this query, not the whole batch or worker
+            cached_result = query_cache.get(query)
+            if cached_result is not None:
+                return {"query": query, "result": cached_result, "cached": True, "latency": round(time.time() - start_time, 3)}
+
+            raw_response = await get_agent_executor().ainvoke(
+                {"query": query},
+                config={"callbacks": [TracingCallbackHandler(tracer)]},
+            )
+            output_text = extract_output_text(raw_response)
+            try:
+                result = (await finalize_research(output_text, query, get_llm())).model_dump()
+                record = {"query": query, "result": result}
+            except Exception as e:
+                record = {"query": query, "error": f"Unable to parse research response: {e}", "raw_output": output_text[:1000]}
+            else:
+                try:
+                    query_cache.put(query, result)
+                except sqlite3.Error:
+                    # Caching is best effort, the answer itself is fine
+                    pass
+        except Exception as e:
+            record = {"query": query, "error": str(e)}
+        record["latency"] = round(time.time() - start_time, 3)
+        record["trace"] = tracer.summary()
+        export_trace(tracer)
+        return record
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_batch(queries: Iterable[Tuple[str, Optional[str]]], output_path: str, concurrency: int = 4) -> dict:
+    """Research (query, error) pairs concurrently, appending each record to output_path as it finishes
+
+    Queries are read as research slots free up, so input piped from another
+    program starts running before it ends.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    queries = iter(queries)
+
+    latencies = []
+    failed = 0
+    start_time = time.time()
+
+    def read_next():
+        # Reading stdin blocks, keep it off the event loop
+        return asyncio.create_task(asyncio.to_thread(next, queries, None))
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        def finish(record: dict):
+            nonlocal failed
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+            latencies.append(record["latency"])
+            if "error" in record:
+                failed += 1
+            status = "error" if "error" in record else "ok"
+            print(f"[{len(latencies)}] {status} in {record['latency']:.2f}s: {record['query'][:80]}", file=sys.stderr)
+
+        reader = read_next()
+        tasks = set()
+        while reader is not None or tasks:
+            done, _ = await asyncio.wait(tasks | ({reader} if reader else set()), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not reader:
+                    tasks.discard(task)
+                    finish(task.result())
+                    continue
+
+                item = task.result()
+                reader = None
+                if item is None:
+                    queries = None
+                    continue
+                query, error = item
+                if error:
+                    finish({"query": query, "error": error, "latency": 0.0})
+                else:
+                    tasks.add(asyncio.create_task(research_one(query, semaphore)))
+            # Read ahead only a little past the running queries
+            if reader is None and queries is not None and len(tasks) < 2 * concurrency:
+                reader = read_next()
+
+    elapsed = time.time() - start_time
+    summary = {
+        "queries": len(latencies),
+        "succeeded": len(latencies) - failed,
+        "failed": failed,
+        "wall_time": round(elapsed, 3),
+        "throughput_per_minute": round(len(latencies) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+    }
+    if latencies:
+        summary.update({
+            "latency_mean": round(sum(latencies) / len(latencies), 3),
+            "latency_p50": _percentile(latencies, 0.5),
+            "latency_p95": _percentile(latencies, 0.95),
+            "latency_max": max(latencies),
+        })
+    summary["query_cache"] = query_cache.stats()
+    summary["prefetch"] = prefetcher.stats()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many research queries concurrently without prompts.")
+    parser.add_argument("input", help="JSONL file of queries, or - to read from stdin")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Maximum number of queries researched at once")
+    args = parser.parse_args(argv)
+
+    print(f"Researching queries from {args.input} with concurrency {args.concurrency}...", file=sys.stderr)
+
+    summary = asyncio.run(run_batch(read_queries(args.input), args.output, args.concurrency))
+    prefetcher.shutdown()
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare html_extract backends with the original BeautifulSoup path on saved pages
+
+Usage: python benchmarks/bench_html_extract.py [--repeat N] [--max-chars N]
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_extract import available_backends, extract_text
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_extract(html: bytes, max_chars: int):
+    """The scrape_webpage extraction this module replaced"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
+        script.extract()
+    text = soup.get_text(separator='\n', strip=True)
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = '\n'.join(chunk for chunk in chunks if chunk)
+    return text[:max_chars], len(text) > max_chars
+
+
+def time_call(func, repeat: int) -> float:
+    """Best-of-repeat wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    candidates = {f"html_extract[{name}]": name for name in available_backends()}
+    if importlib.util.find_spec("bs4") is not None:
+        candidates["legacy[bs4]"] = None
+    else:
+        print("beautifulsoup4 not installed, skipping the legacy baseline")
+
+    print(f"{'fixture':<20}{'extractor':<28}{'ms (budget)':>12}{'ms (full)':>12}{'chars':>8}")
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            html = f.read()
+        name = f"{os.path.basename(path)} {len(html) // 1024}K"
+
+        for label, backend in candidates.items():
+            if backend is None:
+                run = lambda limit: legacy_extract(html, limit if limit is not None else len(html))
+            else:
+                run = lambda limit, backend=backend: extract_text(html, max_chars=limit, backend=backend)
+
+            budget_ms = time_call(lambda: run(args.max_chars), args.repeat)
+            full_ms = time_call(lambda: run(None), args.repeat)
+            chars = len(run(args.max_chars)[0])
+            print(f"{name:<20}{label:<28}{budget_ms:>12.2f}{full_ms:>12.2f}{chars:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Startup cost of the CLI: python -X importtime breakdown plus wall-clock import time
+
+Usage: python benchmarks/bench_startup.py [--module main] [--runs N] [--top N]
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str) -> list:
+    """(cumulative_us, self_us, name) for every module imported by `import module`"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        rows.append((int(fields[1]), int(fields[0]), fields[2].rstrip()))
+    return rows
+
+
+def _depth(name: str) -> int:
+    # -X importtime indents nested imports by two spaces per level after one separating space
+    return (len(name) - len(name.lstrip()) - 1) // 2
+
+
+def direct_imports(rows: list, module: str) -> list:
+    """Rows for the modules that module itself imports, slowest first
+
+    Nested imports are printed before the module that triggered them, one
+    level deeper, so they are the rows right above it at its depth + 1.
+    """
+    index = next((i for i, row in enumerate(rows) if row[2].strip() == module), None)
+    if index is None:
+        return []
+    depth = _depth(rows[index][2])
+    children = []
+    for row in reversed(rows[:index]):
+        if _depth(row[2]) <= depth:
+            break
+        if _depth(row[2]) == depth + 1:
+            children.append(row)
+    return sorted(children, reverse=True)
+
+
+def wall_times(module: str, runs: int) -> list:
+    """Seconds for a fresh interpreter to start and import module, runs times"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest direct imports to list")
+    args = parser.parse_args(argv)
+
+    rows = import_times(args.module)
+    # Per-dependency breakdown: what module imports directly, with everything they pull in
+    children = direct_imports(rows, args.module)
+    total = max((cumulative for cumulative, _, name in rows if name.strip() == args.module), default=0)
+
+    print(f"import {args.module}: {total / 1000:.1f} ms over {len(rows)} modules")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for cumulative, self_us, name in children[:args.top]:
+        print(f"{cumulative / 1000:>14.1f}{self_us / 1000:>10.1f}  {name.strip()}")
+
+    timings = sorted(wall_times(args.module, args.runs))
+    print(f"\nInterpreter start + import over {len(timings)} runs: "
+          f"p50 {timings[len(timings) // 2] * 1000:.1f} ms, min {timings[0] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Scripted chat model that stands in for Gemini in offline benchmarks"""
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Replays a fixed list of AIMessages, one per agent iteration
+
+    The step is derived from how many AI messages are already in the prompt,
+    so the same instance can serve many concurrent agent runs. think_time
+    simulates model latency.
+    """
+
+    script: List[AIMessage]
+    think_time: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> ChatResult:
+        step = sum(1 for message in messages if isinstance(message, AIMessage))
+        scripted = self.script[min(step, len(self.script) - 1)]
+
+        # Rough token counts so traces report something comparable to the real model
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        output_tokens = max(1, len(str(scripted.content)) // 4 + 20 * len(scripted.tool_calls))
+        message = AIMessage(
+            content=scripted.content,
+            tool_calls=scripted.tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.think_time)
+        return self._next_message(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.think_time)
+        return self._next_message(messages)
+
+
+def tool_call(name: str, argument: str, call_id: str) -> dict:
+    """Tool call for a single-input Tool, in the shape Gemini returns"""
+    return {"name": name, "args": {"__arg1": argument}, "id": call_id}
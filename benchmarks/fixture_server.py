@@ -0,0 +1,95 @@
+"""Local HTTP server for the recorded HTML fixtures and a generated PDF paper"""
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+PDF_PATH = "/paper.pdf"
+
+
+def make_pdf(pages: int = 30, lines_per_page: int = 45) -> bytes:
+    """A plain multi-page PDF with real text streams, large enough to exercise page budgets"""
+    def escape(text):
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = []
+    page_ids = []
+    font_id = 3
+    for page in range(pages):
+        lines = [
+            f"Section {page + 1}.{line + 1}: surface code thresholds, logical qubit fidelity and decoder latency."
+            for line in range(lines_per_page)
+        ]
+        stream = "BT /F1 9 Tf 11 TL 50 760 Td " + " ".join(f"({escape(line)}) Tj T*" for line in lines) + " ET"
+        content_id = 4 + 2 * page
+        page_id = content_id + 1
+        objects.append((content_id, f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"))
+        objects.append((page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                                 f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"))
+        page_ids.append(page_id)
+
+    objects.append((1, "<< /Type /Catalog /Pages 2 0 R >>"))
+    objects.append((2, f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>"))
+    objects.append((font_id, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"))
+    objects.sort()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1")
+
+    xref_offset = len(out)
+    size = max(offsets) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode("latin-1")
+    for obj_id in range(1, size):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves benchmarks/fixtures plus the generated PDF, without request logging"""
+
+    pdf_bytes = b""
+
+    def do_GET(self):
+        if self.path == PDF_PATH:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Content-Length", str(len(self.pdf_bytes)))
+            self.end_headers()
+            self.wfile.write(self.pdf_bytes)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Run the fixture server on a free local port in a background thread"""
+
+    def __init__(self, pdf_pages: int = 30):
+        FixtureHandler.pdf_bytes = make_pdf(pdf_pages)
+        handler = functools.partial(FixtureHandler, directory=FIXTURES_DIR)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return self.base_url + "/" + path.lstrip("/")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
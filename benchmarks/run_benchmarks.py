@@ -0,0 +1,296 @@
+"""Offline end-to-end benchmarks: fake LLM, local fixture server, stubbed search and arXiv
+
+Usage: python benchmarks/run_benchmarks.py [--runs N] [--think-time S] [--compare]
+
+Results are written to benchmarks/results/<timestamp>-<commit>.json; --compare
+prints the change against the most recent earlier result and flags regressions.
+"""
+import argparse
+import asyncio
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Isolate every on-disk cache before the project modules read their settings
+SCRATCH_DIR = tempfile.mkdtemp(prefix="research-bench-")
+os.environ["PAGE_CACHE_DIR"] = os.path.join(SCRATCH_DIR, "page_cache")
+os.environ["QUERY_CACHE_PATH"] = os.path.join(SCRATCH_DIR, "query_cache.sqlite")
+os.environ["ARXIV_INDEX_PATH"] = os.path.join(SCRATCH_DIR, "arxiv_index.sqlite")
+os.environ["LOCAL_CORPUS_PATH"] = os.path.join(SCRATCH_DIR, "local_corpus.sqlite")
+# Background downloads would make the scenario timings depend on thread scheduling
+os.environ["PREFETCH_WORKERS"] = "0"
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from fake_llm import ScriptedChatModel, tool_call
+from fixture_server import PDF_PATH, FixtureServer
+
+QUERY = "recent advances in quantum error correction"
+
+
+# Stubs for the network clients
+def install_stubs(server: FixtureServer):
+    """Point search at the fixture server and replace the arxiv package"""
+    import search_client
+
+    def fake_fetch(query, max_results):
+        pages = ["article.html", "docs.html", "article.html?mirror=1"]
+        return [
+            {"title": f"Fixture page {rank}", "url": server.url(page), "snippet": f"Snippet about {query}", "rank": rank}
+            for rank, page in enumerate(pages[:max_results], 1)
+        ]
+
+    search_client.search_client._fetch = fake_fetch
+
+    class Author:
+        def __init__(self, name):
+            self.name = name
+
+    class Paper:
+        def __init__(self, i):
+            self.title = f"Fixture paper {i}"
+            self.authors = [Author("A. Researcher"), Author("B. Scientist")]
+            self.summary = "We study logical error rates of surface codes under circuit-level noise. " * 5
+            self.pdf_url = server.url(PDF_PATH)
+            self.published = datetime(2024, 1, i % 28 + 1)
+            self.short_id = f"2401.{i:05d}v1"
+
+        def get_short_id(self):
+            return self.short_id
+
+    class Search:
+        def __init__(self, query="", id_list=None, max_results=5, sort_by=None, **kwargs):
+            self.id_list = id_list or []
+            self.max_results = max_results
+
+    class Client:
+        def __init__(self, **kwargs):
+            pass
+
+        def results(self, search):
+            if search.id_list:
+                return (Paper(int(paper_id.split(".")[1][:5])) for paper_id in search.id_list)
+            return (Paper(i) for i in range(search.max_results))
+
+    fake_arxiv = types.ModuleType("arxiv")
+    fake_arxiv.Client = Client
+    fake_arxiv.Search = Search
+    fake_arxiv.SortCriterion = types.SimpleNamespace(Relevance="relevance")
+    sys.modules["arxiv"] = fake_arxiv
+
+
+def disable_politeness():
+    """The fixture server is local, per-domain delays would only measure sleep"""
+    import arxiv_client
+    from rate_limit import rate_limiter
+    rate_limiter.default = None
+    rate_limiter.limits.clear()
+    arxiv_client.arxiv_client.min_interval = 0.0
+
+
+def clear_page_cache():
+    shutil.rmtree(os.environ["PAGE_CACHE_DIR"], ignore_errors=True)
+
+
+# Measurement
+def summarize(latencies):
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(total / len(ordered) * 1000, 2),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 2),
+        "min_ms": round(ordered[0] * 1000, 2),
+        "throughput_per_s": round(len(ordered) / total, 2) if total else None,
+    }
+
+
+def measure(func, runs: int, setup=None) -> dict:
+    """Latency over runs, then one extra run under tracemalloc for peak Python memory"""
+    latencies = []
+    for _ in range(runs):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = summarize(latencies)
+    result["peak_mem_kb"] = round(peak / 1024, 1)
+    return result
+
+
+def build_executor(server: FixtureServer, think_time: float):
+    """main.py's agent stack driven by the scripted model"""
+    from langchain_core.messages import AIMessage
+    from main import build_agent_executor
+
+    final_answer = json.dumps({
+        "topic": QUERY,
+        "summary": "Offline benchmark summary.",
+        "key_points": ["Surface code thresholds", "Decoder latency"],
+        "sources": [{"title": "Fixture article", "url": server.url("article.html")}],
+        "tools_used": ["research_topic", "scrape_webpage", "extract_pdf", "search_academic_papers"],
+    })
+    script = [
+        AIMessage(content="", tool_calls=[tool_call("research_topic", QUERY, "call_1")]),
+        AIMessage(content="", tool_calls=[
+            tool_call("scrape_webpage", server.url("docs.html"), "call_2"),
+            tool_call("extract_pdf", server.url(PDF_PATH), "call_3"),
+            tool_call("search_academic_papers", QUERY, "call_4"),
+        ]),
+        AIMessage(content=final_answer),
+    ]
+    return build_agent_executor(llm=ScriptedChatModel(script=script, think_time=think_time), verbose=False)
+
+
+def check_stream_progress(executor, url: str):
+    """The streamed progress line of a tool call shows its argument, not {}"""
+    from streaming import StreamPrinter, print_stream
+
+    out = io.StringIO()
+    asyncio.run(print_stream(executor, QUERY, printer=StreamPrinter(out=out)))
+    lines = [line for line in out.getvalue().splitlines() if line.startswith("-> scrape_webpage:")]
+    if not lines or url[:70] not in lines[0]:
+        raise RuntimeError(f"Streamed tool progress lacks the URL: {lines}")
+
+
+def run_all(runs: int, think_time: float, concurrency: int) -> dict:
+    results = {}
+    with FixtureServer() as server:
+        install_stubs(server)
+        disable_politeness()
+        import tools
+
+        article, docs, pdf = server.url("article.html"), server.url("docs.html"), server.url(PDF_PATH)
+
+        # Sanity check that the tools actually read the fixtures
+        sample = tools.scrape_webpage(article)
+        if sample.startswith("Error"):
+            raise RuntimeError(f"Fixture fetch failed: {sample}")
+
+        results["scrape_webpage.cold"] = measure(lambda: tools.scrape_webpage(docs), runs, setup=clear_page_cache)
+        results["scrape_webpage.warm"] = measure(lambda: tools.scrape_webpage(docs), runs)
+        results["extract_pdf.cold"] = measure(lambda: tools.extract_text_from_pdf_url(pdf), runs, setup=clear_page_cache)
+        results["extract_pdf.warm"] = measure(lambda: tools.extract_text_from_pdf_url(pdf), runs)
+        results["research_topic.cold"] = measure(lambda: tools.research_topic(QUERY), runs, setup=clear_page_cache)
+        results["search_arxiv"] = measure(lambda: tools.search_arxiv(QUERY), runs)
+        results["search_local_corpus"] = measure(lambda: tools.search_local_corpus(QUERY), runs)
+
+        executor = build_executor(server, think_time)
+        check_stream_progress(executor, docs)
+        results["agent_executor.cold"] = measure(
+            lambda: asyncio.run(executor.ainvoke({"query": QUERY})), runs, setup=clear_page_cache
+        )
+
+        async def concurrent_batch():
+            await asyncio.gather(*(executor.ainvoke({"query": f"{QUERY} {i}"}) for i in range(concurrency)))
+
+        clear_page_cache()
+        start = time.perf_counter()
+        asyncio.run(concurrent_batch())
+        elapsed = time.perf_counter() - start
+        results["agent_executor.concurrent"] = {
+            "queries": concurrency,
+            "wall_ms": round(elapsed * 1000, 2),
+            "throughput_per_s": round(concurrency / elapsed, 2),
+        }
+    return results
+
+
+# Persistence and comparison
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results: dict, args) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = git_commit()
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": stamp,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {"runs": args.runs, "think_time": args.think_time, "concurrency": args.concurrency},
+            "results": results,
+        }, f, indent=2)
+    return path
+
+
+def compare(path: str, threshold: float):
+    """Print p50 changes against the previous results file, flag slowdowns above threshold"""
+    previous = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, "*.json")) if p != path)
+    if not previous:
+        print("No earlier results to compare against")
+        return
+    with open(previous[-1], "r", encoding="utf-8") as f:
+        before = json.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        after = json.load(f)
+
+    print(f"\nCompared with {before['commit']} ({before['timestamp']}):")
+    for name, stats in after["results"].items():
+        old = before["results"].get(name, {})
+        key = "p50_ms" if "p50_ms" in stats else "wall_ms"
+        if key not in old or not old[key]:
+            continue
+        change = (stats[key] - old[key]) / old[key]
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"  {name:<28}{old[key]:>10.2f} -> {stats[key]:>10.2f} ms ({change:+.0%}){flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=0.2, help="Simulated LLM latency per iteration in seconds")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent agent runs for the throughput scenario")
+    parser.add_argument("--compare", action="store_true", help="Compare with the previous results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative p50 slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    try:
+        results = run_all(args.runs, args.think_time, args.concurrency)
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+
+    print(f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'peak KB':>10}{'per s':>8}")
+    for name, stats in results.items():
+        p50 = stats.get("p50_ms", stats.get("wall_ms"))
+        print(f"{name:<28}{p50:>10.2f}{stats.get('p95_ms', 0):>10.2f}{stats.get('peak_mem_kb', 0):>10.1f}{stats['throughput_per_s'] or 0:>8.2f}")
+
+    path = save_results(results, args)
+    print(f"\nResults saved to {os.path.relpath(path, ROOT)}")
+    if args.compare:
+        compare(path, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""AgentExecutor that stops gathering once tool calls stop adding information"""
+import json
+import re
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+
+from structured_output import ResearchResponse
+
+URL_RE = re.compile(r"https?://[^\s<>\"'()\[\]]+")
+WORD_RE = re.compile(r"\w+")
+
+# Observation returned instead of running a tool once gathering has ended
+ANSWER_NOW = (
+    "Research budget reached ({reason}). Do not call more tools; "
+    "write the final answer now in the required JSON format using the results above."
+)
+DUPLICATE_CALL = "Already called {tool} with these arguments (call {index}), use that result instead of repeating it."
+
+SYNTHESIS_PROMPT = """Write the final research answer for the query "{query}" using only the tool results below.
+Cite the URLs that appear in them as sources.
+
+{evidence}"""
+
+# Per-observation and total caps on tool output passed to the synthesis call
+SYNTHESIS_STEP_CHARS = 3000
+SYNTHESIS_TOTAL_CHARS = 40000
+
+
+def _call_key(tool: str, tool_input) -> str:
+    if isinstance(tool_input, dict) and len(tool_input) == 1:
+        tool_input = next(iter(tool_input.values()))
+    if not isinstance(tool_input, str):
+        tool_input = json.dumps(tool_input, sort_keys=True, default=str)
+    return tool + ":" + " ".join(tool_input.lower().split())
+
+
+class EvidenceBudget:
+    """What one run's tool calls have found so far, and whether more are worth it
+
+    Each observation is split into word trigrams and the share not seen in
+    earlier observations is that call's novelty. Gathering ends when at least
+    min_sources distinct URLs are known and the last patience calls each had
+    novelty below novelty_threshold; the model is then told to answer. Past
+    soft_max_iterations the run only continues while calls are still novel,
+    and the time budget ends it outright.
+    """
+
+    def __init__(
+        self,
+        min_sources: int = 4,
+        novelty_threshold: float = 0.2,
+        patience: int = 2,
+        soft_max_iterations: int = 10,
+        time_budget: Optional[float] = None,
+    ):
+        self.min_sources = min_sources
+        self.novelty_threshold = novelty_threshold
+        self.patience = patience
+        self.soft_max_iterations = soft_max_iterations
+        self.time_budget = time_budget
+        self.query: Optional[str] = None
+        self.sources = set()
+        self.novelty: List[float] = []
+        self.stop_reason: Optional[str] = None
+        self.ignored_stops = 0
+        self.blocked_calls = 0
+        self._calls: Dict[str, int] = {}
+        self._shingles = set()
+
+    def check(self, tool: str, tool_input) -> Optional[str]:
+        """Observation to return instead of running the call, or None to let it run"""
+        if self.stop_reason:
+            self.ignored_stops += 1
+            self.blocked_calls += 1
+            return ANSWER_NOW.format(reason=self.stop_reason)
+
+        key = _call_key(tool, tool_input)
+        if key in self._calls:
+            self.blocked_calls += 1
+            return DUPLICATE_CALL.format(tool=tool, index=self._calls[key])
+        self._calls[key] = len(self._calls) + 1
+        return None
+
+    def record(self, tool: str, tool_input, observation: Any):
+        """Update sources and novelty with a finished tool call"""
+        text = str(observation)
+        self.sources.update(url.rstrip(".,;:") for url in URL_RE.findall(f"{tool_input} {text}"))
+
+        words = WORD_RE.findall(text.lower())
+        shingles = {hash(tuple(words[i:i + 3])) for i in range(max(len(words) - 2, 0))}
+        novelty = len(shingles - self._shingles) / len(shingles) if shingles and not text.startswith("Error") else 0.0
+        self._shingles |= shingles
+        self.novelty.append(novelty)
+
+        recent = self.novelty[-self.patience:]
+        if (
+            len(self.sources) >= self.min_sources
+            and len(recent) == self.patience
+            and all(n < self.novelty_threshold for n in recent)
+        ):
+            self.stop_reason = f"{len(self.sources)} sources, the last {self.patience} calls added little new information"
+
+    def should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        if self.time_budget is not None and time_elapsed >= self.time_budget:
+            self.stop_reason = self.stop_reason or "time budget used"
+            return False
+        # The model kept calling tools after being told to answer
+        if self.stop_reason and self.ignored_stops:
+            return False
+        if iterations >= self.soft_max_iterations:
+            still_learning = bool(self.novelty) and self.novelty[-1] >= self.novelty_threshold
+            if not still_learning:
+                self.stop_reason = self.stop_reason or "iteration budget used"
+                return False
+        return True
+
+
+_current_budget: ContextVar[Optional[EvidenceBudget]] = ContextVar("current_budget", default=None)
+
+
+class BudgetedAgentExecutor(AgentExecutor):
+    """AgentExecutor driven by an EvidenceBudget
+
+    Repeated calls with identical arguments are answered without running the
+    tool, and once the budget says gathering is done further tool calls are
+    answered with an instruction to write the final answer. If the run is
+    stopped anyway (budget, max_iterations or max_execution_time), the answer
+    is synthesized from the gathered tool results with one structured call to
+    synthesis_llm instead of LangChain's fixed "Agent stopped" message.
+
+    The executor is shared across concurrent runs, so each run's budget lives
+    in a context variable created on its first _should_continue check.
+    """
+
+    synthesis_llm: Optional[Any] = None
+    min_sources: int = 4
+    novelty_threshold: float = 0.2
+    patience: int = 2
+    soft_max_iterations: int = 10
+    # Share of max_execution_time spent gathering, the rest is left for the answer
+    gather_time_fraction: float = 0.8
+
+    def _new_budget(self) -> EvidenceBudget:
+        return EvidenceBudget(
+            min_sources=self.min_sources,
+            novelty_threshold=self.novelty_threshold,
+            patience=self.patience,
+            soft_max_iterations=self.soft_max_iterations,
+            time_budget=self.max_execution_time * self.gather_time_fraction if self.max_execution_time else None,
+        )
+
+    def _should_continue(self, iterations: int, time_elapsed: float) -> bool:
+        if iterations == 0:
+            _current_budget.set(self._new_budget())
+        budget = _current_budget.get()
+        if not super()._should_continue(iterations, time_elapsed):
+            return False
+        return budget is None or budget.should_continue(iterations, time_elapsed)
+
+    # Capture the query for the synthesis prompt
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        budget = _current_budget.get()
+        if budget is not None and budget.query is None:
+            budget.query = str(inputs.get("query", ""))
+        yield from super()._iter_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager)
+
+    async def _aiter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        budget = _current_budget.get()
+        if budget is not None and budget.query is None:
+            budget.query = str(inputs.get("query", ""))
+        async for step in super()._aiter_next_step(
+            name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+        ):
+            yield step
+
+    # Tool calls
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action: AgentAction, run_manager=None) -> AgentStep:
+        budget = _current_budget.get()
+        blocked = budget.check(agent_action.tool, agent_action.tool_input) if budget else None
+        if blocked:
+            return AgentStep(action=agent_action, observation=blocked)
+        step = super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        if budget:
+            budget.record(agent_action.tool, agent_action.tool_input, step.observation)
+        return step
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action: AgentAction, run_manager=None) -> AgentStep:
+        budget = _current_budget.get()
+        blocked = budget.check(agent_action.tool, agent_action.tool_input) if budget else None
+        if blocked:
+            return AgentStep(action=agent_action, observation=blocked)
+        step = await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        if budget:
+            budget.record(agent_action.tool, agent_action.tool_input, step.observation)
+        return step
+
+    # Synthesis after a forced stop
+    def _stopped(self, output: AgentFinish) -> bool:
+        return self.synthesis_llm is not None and str(output.return_values.get("output", "")).startswith("Agent stopped")
+
+    def _synthesis_prompt(self, intermediate_steps: List[Tuple[AgentAction, str]]) -> str:
+        parts, total = [], 0
+        for action, observation in intermediate_steps:
+            text = str(observation)
+            if text.startswith(("Error", "Research budget reached", "Already called")):
+                continue
+            part = f"[{action.tool}: {action.tool_input}]\n{text[:SYNTHESIS_STEP_CHARS]}"
+            if total + len(part) > SYNTHESIS_TOTAL_CHARS:
+                break
+            parts.append(part)
+            total += len(part)
+        budget = _current_budget.get()
+        query = budget.query if budget and budget.query else "the research question"
+        return SYNTHESIS_PROMPT.format(query=query, evidence="\n\n".join(parts) or "(no tool results)")
+
+    def _synthesized(self, response, output: AgentFinish) -> AgentFinish:
+        if isinstance(response, ResearchResponse):
+            text = response.model_dump_json()
+        else:
+            text = json.dumps(response)
+        return AgentFinish({**output.return_values, "output": text}, output.log)
+
+    def _return(self, output: AgentFinish, intermediate_steps: list, run_manager=None) -> Dict[str, Any]:
+        if self._stopped(output):
+            try:
+                structured_llm = self.synthesis_llm.with_structured_output(ResearchResponse)
+                output = self._synthesized(structured_llm.invoke(self._synthesis_prompt(intermediate_steps)), output)
+            except Exception:
+                # Keep LangChain's stop message, finalize_research gets another chance at it
+                pass
+        return super()._return(output, intermediate_steps, run_manager)
+
+    async def _areturn(self, output: AgentFinish, intermediate_steps: list, run_manager=None) -> Dict[str, Any]:
+        if self._stopped(output):
+            try:
+                structured_llm = self.synthesis_llm.with_structured_output(ResearchResponse)
+                response = await structured_llm.ainvoke(self._synthesis_prompt(intermediate_steps))
+                output = self._synthesized(response, output)
+            except Exception:
+                # Keep LangChain's stop message, finalize_research gets another chance at it
+                pass
+        return await super()._areturn(output, intermediate_steps, run_manager)
@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from rate_limit import domain_of
+
+# Statuses that won't change on retry for this URL (auth walls, paywalls, missing pages)
+URL_FATAL_STATUSES = {401, 402, 403, 404, 410, 451}
+# Statuses that count against the whole domain (bot blocks, throttling, server trouble)
+DOMAIN_FAILURE_STATUSES = {403, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of contacting a URL or domain that recently failed"""
+
+
+class CircuitBreaker:
+    """Remembers failing URLs and domains and refuses to contact them for a while
+
+    A URL that returned a permanent error (401/403/404/...) is skipped for
+    url_ttl seconds with the original error. A domain opens after
+    failure_threshold consecutive failures (blocks, 429/5xx, timeouts,
+    connection errors) and stays open for cooldown seconds; then one trial
+    request is let through, which closes it on success or reopens it with
+    twice the cooldown on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 300, max_cooldown: float = 3600, url_ttl: float = 3600):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.url_ttl = url_ttl
+        self._lock = threading.Lock()
+        self._urls: Dict[str, tuple] = {}
+        # domain -> {"failures", "open_until", "cooldown", "error", "trial"}
+        self._domains: Dict[str, dict] = {}
+        self._counters = {"short_circuits": 0, "url_opens": 0, "domain_opens": 0}
+
+    def check(self, url: str) -> bool:
+        """Raise CircuitOpenError if url or its domain is known to be failing
+
+        Returns True when the caller makes the domain's trial request and must
+        call end_trial() once it is over, however it ended.
+        """
+        now = time.time()
+        domain = domain_of(url)
+        with self._lock:
+            entry = self._urls.get(url)
+            if entry is not None:
+                if entry[0] > now:
+                    self._counters["short_circuits"] += 1
+                    raise CircuitOpenError(f"skipped, {url} failed recently: {entry[1]}")
+                del self._urls[url]
+
+            state = self._domains.get(domain)
+            if state is None or state["open_until"] is None:
+                return False
+            if state["open_until"] > now or state["trial"]:
+                self._counters["short_circuits"] += 1
+                raise CircuitOpenError(f"skipped, {domain} is failing repeatedly: {state['error']}")
+            # Cooldown over, this caller makes the single trial request
+            state["trial"] = True
+            return True
+
+    def end_trial(self, url: str):
+        """Let another trial through if this one ended without a recorded result"""
+        with self._lock:
+            state = self._domains.get(domain_of(url))
+            if state is not None:
+                state["trial"] = False
+
+    def record_success(self, url: str):
+        with self._lock:
+            self._domains.pop(domain_of(url), None)
+
+    def record_failure(self, url: str, error: str, status: Optional[int] = None):
+        """Count a failed request, status None means a network error or timeout"""
+        now = time.time()
+        domain = domain_of(url)
+        with self._lock:
+            if status in URL_FATAL_STATUSES:
+                self._urls[url] = (now + self.url_ttl, error)
+                self._counters["url_opens"] += 1
+            if status is not None and status not in DOMAIN_FAILURE_STATUSES:
+                # The server answered normally, only this URL is bad
+                self._domains.pop(domain, None)
+                return
+
+            state = self._domains.setdefault(
+                domain, {"failures": 0, "open_until": None, "cooldown": self.cooldown, "error": None, "trial": False}
+            )
+            state["failures"] += 1
+            state["error"] = error
+            if state["trial"]:
+                # The trial request failed, back off longer
+                state["cooldown"] = min(state["cooldown"] * 2, self.max_cooldown)
+            if state["trial"] or state["failures"] >= self.failure_threshold:
+                state["open_until"] = now + state["cooldown"]
+                state["trial"] = False
+                self._counters["domain_opens"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counters = dict(self._counters)
+            counters["open_urls"] = len(self._urls)
+            counters["open_domains"] = sum(1 for s in self._domains.values() if s["open_until"] is not None)
+        return counters
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,150 @@
+import math
+import re
+from collections import Counter
+from typing import List, Tuple
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "was", "were", "be", "by",
+    "with", "as", "at", "it", "its", "this", "that", "from", "but", "not", "have", "has", "had", "will",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about four characters per token for English text"""
+    return max(1, len(text) // 4)
+
+
+def tokenize(text: str) -> List[str]:
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS]
+
+
+def split_passages(text: str, target_chars: int = 500) -> List[str]:
+    """Group lines into passages of roughly target_chars, blank lines always end a passage"""
+    passages = []
+    current = []
+    length = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            if current:
+                passages.append("\n".join(current))
+                current, length = [], 0
+            continue
+        current.append(line)
+        length += len(line)
+        if length >= target_chars:
+            passages.append("\n".join(current))
+            current, length = [], 0
+    if current:
+        passages.append("\n".join(current))
+    return passages
+
+
+def bm25_scores(query: str, passages: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 score of every passage against query"""
+    documents = [Counter(tokenize(passage)) for passage in passages]
+    if not documents:
+        return []
+    avg_length = sum(sum(doc.values()) for doc in documents) / len(documents) or 1.0
+
+    df = Counter()
+    for doc in documents:
+        df.update(doc.keys())
+
+    scores = []
+    for doc in documents:
+        length = sum(doc.values())
+        score = 0.0
+        for term in set(tokenize(query)):
+            if term not in doc:
+                continue
+            idf = math.log(1 + (len(documents) - df[term] + 0.5) / (df[term] + 0.5))
+            tf = doc[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def _allocate(needs: List[int], budget: int) -> List[int]:
+    """Split budget evenly, handing what small sources don't need to the larger ones"""
+    allocation = [0] * len(needs)
+    pending = list(range(len(needs)))
+    while pending and budget > 0:
+        share = budget // len(pending)
+        satisfied = [i for i in pending if needs[i] <= share]
+        if not satisfied:
+            for i in pending:
+                allocation[i] = share
+            break
+        for i in satisfied:
+            allocation[i] = needs[i]
+            budget -= needs[i]
+        pending = [i for i in pending if i not in satisfied]
+    return allocation
+
+
+def pack_sources(query: str, sources: List[Tuple[str, str]], token_budget: int = 5000) -> str:
+    """Fit (heading, text) sources into token_budget
+
+    Passages repeated across sources are kept only once, every source gets a
+    fair share of the budget, and within its share a source keeps its passages
+    most relevant to the query (BM25). The first passage of each source, which
+    carries titles and metadata, is always kept, cut to the source's share if
+    it is longer.
+    """
+    seen = set()
+    per_source = []
+    for heading, text in sources:
+        passages = []
+        for passage in split_passages(text):
+            fingerprint = " ".join(tokenize(passage))
+            # Cookie banners, nav residue and syndicated copies repeat across pages
+            if fingerprint and fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+            passages.append(passage)
+        per_source.append((heading, passages))
+
+    # Rank every passage against the query over the whole pool so idf reflects all sources
+    pool = [passage for _, passages in per_source for passage in passages]
+    scores = iter(bm25_scores(query, pool))
+    ranked_sources = [(heading, [(passage, next(scores)) for passage in passages]) for heading, passages in per_source]
+
+    headings_cost = sum(estimate_tokens(heading) for heading, _ in sources)
+    needs = [sum(estimate_tokens(p) for p, _ in passages) for _, passages in ranked_sources]
+    allocation = _allocate(needs, max(0, token_budget - headings_cost))
+
+    packed = []
+    for (heading, passages), allowance in zip(ranked_sources, allocation):
+        chosen = set()
+        texts = {}
+        used = 0
+        if passages and allowance > 0:
+            lead = passages[0][0]
+            if estimate_tokens(lead) > allowance:
+                # A long lead paragraph would otherwise crowd out the whole source
+                lead = lead[:allowance * 4].rsplit(" ", 1)[0] + "..."
+            chosen.add(0)
+            texts[0] = lead
+            used = estimate_tokens(lead)
+        order = sorted(range(1, len(passages)), key=lambda i: passages[i][1], reverse=True)
+        for i in order:
+            cost = estimate_tokens(passages[i][0])
+            if used + cost <= allowance:
+                chosen.add(i)
+                used += cost
+
+        # Keep document order so the excerpt still reads naturally
+        excerpt = []
+        previous = -1
+        for i in sorted(chosen):
+            if excerpt and i != previous + 1:
+                excerpt.append("[...]")
+            excerpt.append(texts.get(i, passages[i][0]))
+            previous = i
+        if len(chosen) < len(passages):
+            excerpt.append(f"[{len(passages) - len(chosen)} less relevant passages omitted]")
+
+        packed.append(f"{heading}\n\n" + "\n\n".join(excerpt))
+
+    return "\n\n---\n\n".join(packed)
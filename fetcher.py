@@ -0,0 +1,35 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Tuple
+
+
+def fetch_all(
+    urls: List[str],
+    fetch_func: Callable[[str], str],
+    max_workers: int = 5,
+    timeout: float = 30,
+) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Fetch URLs in parallel and return (url, content, error) tuples in input order"""
+    if not urls:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)))
+    try:
+        # Each worker runs in a copy of the caller's context so tracing spans nest correctly
+        futures = [executor.submit(contextvars.copy_context().run, fetch_func, url) for url in urls]
+        # Slow hosts must not hold up the rest, so everything shares one deadline
+        wait(futures, timeout=timeout)
+
+        results = []
+        for url, future in zip(urls, futures):
+            if not future.done():
+                future.cancel()
+                results.append((url, None, f"Timed out after {timeout} seconds"))
+            elif future.exception() is not None:
+                results.append((url, None, str(future.exception())))
+            else:
+                results.append((url, future.result(), None))
+        return results
+    finally:
+        # Don't block on stragglers, their results are already discarded
+        executor.shutdown(wait=False, cancel_futures=True)
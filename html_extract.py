@@ -0,0 +1,185 @@
+import importlib.util
+import os
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+# Page chrome that never carries article content
+BOILERPLATE_TAGS = ("script", "style", "nav", "footer", "header", "aside", "noscript", "template")
+
+Html = Union[str, bytes]
+
+
+def _decode(html: Html) -> str:
+    if isinstance(html, str):
+        return html
+    try:
+        return html.decode("utf-8")
+    except UnicodeDecodeError:
+        # Fall back to charset sniffing for legacy encodings
+        from bs4 import UnicodeDammit
+        return UnicodeDammit(html).unicode_markup
+
+
+class _TextBudget:
+    """Collect cleaned lines of text until max_chars is reached"""
+
+    def __init__(self, max_chars: Optional[int]):
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.truncated = False
+
+    def add(self, chunk: str) -> bool:
+        """Add a raw text chunk, returns False once the budget is used up"""
+        for line in chunk.splitlines():
+            for phrase in line.split("  "):
+                phrase = phrase.strip()
+                if not phrase:
+                    continue
+                cost = len(phrase) + (1 if self.parts else 0)
+                if self.max_chars is not None and self.length + cost > self.max_chars:
+                    remaining = self.max_chars - self.length - (1 if self.parts else 0)
+                    if remaining > 0:
+                        self.parts.append(phrase[:remaining])
+                        self.length = self.max_chars
+                    self.truncated = True
+                    return False
+                self.parts.append(phrase)
+                self.length += cost
+        return True
+
+    def result(self) -> Tuple[str, bool]:
+        return "\n".join(self.parts), self.truncated
+
+
+def _collect(chunks: Iterable[str], max_chars: Optional[int]) -> Tuple[str, bool]:
+    budget = _TextBudget(max_chars)
+    for chunk in chunks:
+        if not budget.add(chunk):
+            break
+    return budget.result()
+
+
+# Backends
+def _extract_selectolax(html: Html, max_chars: Optional[int]) -> Tuple[str, bool]:
+    from selectolax.parser import HTMLParser as LexborParser
+
+    tree = LexborParser(html)
+    tree.strip_tags(list(BOILERPLATE_TAGS))
+    root = tree.body or tree.root
+    if root is None:
+        return "", False
+
+    def chunks():
+        for node in root.traverse(include_text=True):
+            if node.tag == "-text":
+                yield node.text(deep=False)
+
+    return _collect(chunks(), max_chars)
+
+
+def _extract_lxml(html: Html, max_chars: Optional[int]) -> Tuple[str, bool]:
+    import lxml.html
+    from lxml import etree
+
+    root = lxml.html.document_fromstring(html)
+    etree.strip_elements(root, *BOILERPLATE_TAGS, etree.Comment, with_tail=False)
+
+    def chunks():
+        # Explicit stack so tails come after the element's children and the walk can stop early
+        stack = [(root, False)]
+        while stack:
+            element, closing = stack.pop()
+            if closing:
+                if element.tail and element is not root:
+                    yield element.tail
+                continue
+            if element.text:
+                yield element.text
+            stack.append((element, True))
+            for child in reversed(element):
+                if isinstance(child.tag, str):
+                    stack.append((child, False))
+                elif child.tail:
+                    stack.append((child, True))
+
+    return _collect(chunks(), max_chars)
+
+
+class _StreamingTextParser(HTMLParser):
+    """Single-pass html.parser handler that skips boilerplate subtrees"""
+
+    def __init__(self, budget: _TextBudget):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.skip_depth = 0
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in BOILERPLATE_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in BOILERPLATE_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth and not self.done:
+            self.done = not self.budget.add(data)
+
+
+def _extract_stdlib(html: Html, max_chars: Optional[int], chunk_size: int = 32 * 1024) -> Tuple[str, bool]:
+    budget = _TextBudget(max_chars)
+    parser = _StreamingTextParser(budget)
+    text = _decode(html)
+
+    # Feed in chunks so parsing stops as soon as the budget is spent
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return budget.result()
+
+
+BACKENDS: Dict[str, Callable[[Html, Optional[int]], Tuple[str, bool]]] = {
+    "selectolax": _extract_selectolax,
+    "lxml": _extract_lxml,
+    "stdlib": _extract_stdlib,
+}
+
+_BACKEND_MODULES = {"selectolax": "selectolax.parser", "lxml": "lxml.html", "stdlib": "html.parser"}
+
+
+@lru_cache(maxsize=None)
+def available_backends() -> tuple:
+    """Installed backends, fastest first"""
+    available = []
+    for name, module in _BACKEND_MODULES.items():
+        try:
+            if importlib.util.find_spec(module) is not None:
+                available.append(name)
+        except ModuleNotFoundError:
+            continue
+    return tuple(available)
+
+
+def get_backend(name: Optional[str] = None) -> str:
+    """Requested backend, HTML_EXTRACT_BACKEND, or the fastest installed one"""
+    name = name or os.getenv("HTML_EXTRACT_BACKEND")
+    available = available_backends()
+    if name:
+        if name not in available:
+            raise ValueError(f"HTML backend '{name}' is not available, choose from {list(available)}")
+        return name
+    return available[0]
+
+
+def extract_text(html: Html, max_chars: Optional[int] = None, backend: Optional[str] = None) -> Tuple[str, bool]:
+    """Visible text of an HTML page without boilerplate, cut at max_chars
+
+    Returns the text and whether it was truncated.
+    """
+    return BACKENDS[get_backend(backend)](html, max_chars)
@@ -0,0 +1,167 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from circuit_breaker import CircuitBreaker, circuit_breaker
+from rate_limit import DomainRateLimiter, rate_limiter
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Referer": "https://www.google.com/",
+    "DNT": "1",
+}
+
+
+def _accept_encoding() -> str:
+    """Only advertise brotli when urllib3 can actually decode it"""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        return "gzip, deflate"
+
+
+def site_headers(url: str) -> Dict[str, str]:
+    """Domain-specific headers/cookies for certain sites"""
+    domain = urlparse(url).netloc
+    if "medium.com" in domain:
+        return {"Cookie": "medium-tracking-id=123; uid=abc123"}
+    elif "github.com" in domain:
+        return {"Accept": "application/json"}
+    return {}
+
+
+class HttpClient:
+    """Shared transport for all fetch tools
+
+    Keeps one pooled keep-alive session, negotiates compression, retries
+    429/5xx with exponential backoff and caps concurrent requests per host.
+    Every request first passes the circuit breaker, which fails fast for
+    URLs and domains that recently failed, and then waits for its domain's
+    rate limiter token.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 4,
+        pool_size: int = 20,
+        retries: int = 3,
+        backoff: float = 0.5,
+        limiter: Optional[DomainRateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_per_host = max_per_host
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = limiter or rate_limiter
+        self.breaker = breaker or circuit_breaker
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        """The pooled requests session, created on first use to keep imports cheap"""
+        with self._lock:
+            if self._session is None:
+                self._session = self._build_session()
+            return self._session
+
+    def _build_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.retries,
+            backoff_factor=self.backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        session.headers["Accept-Encoding"] = _accept_encoding()
+        return session
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def _merge_headers(self, url: str, headers: Optional[dict]) -> Dict[str, str]:
+        merged = site_headers(url)
+        merged.update(headers or {})
+        return merged
+
+    def _admit(self, url: str) -> bool:
+        # Fail fast on known-bad targets, and wait for a token before taking a host slot
+        trial = self.breaker.check(url)
+        try:
+            self.limiter.acquire(url)
+        except BaseException:
+            if trial:
+                self.breaker.end_trial(url)
+            raise
+        return trial
+
+    def _send(self, url: str, headers: Optional[dict], timeout: float, stream: bool = False, trial: bool = False):
+        try:
+            try:
+                response = self.session.get(url, headers=self._merge_headers(url, headers), timeout=timeout, stream=stream)
+            except OSError as e:
+                # requests' connection errors and timeouts are OSErrors
+                self.breaker.record_failure(url, str(e))
+                raise
+
+            if response.status_code >= 400:
+                self.breaker.record_failure(url, f"{response.status_code} {response.reason}", response.status_code)
+                if response.status_code == 429:
+                    self.limiter.penalize(url, _retry_after(response.headers.get("Retry-After")))
+            else:
+                self.breaker.record_success(url)
+            return response
+        finally:
+            # Any other exception would otherwise leave the domain waiting on this trial forever
+            if trial:
+                self.breaker.end_trial(url)
+
+    def get(self, url: str, headers: Optional[dict] = None, timeout: float = 15):
+        """GET url with the body fully read before the host slot is released"""
+        trial = self._admit(url)
+        with self._host_slot(url):
+            return self._send(url, headers, timeout, trial=trial)
+
+    @contextmanager
+    def stream(self, url: str, headers: Optional[dict] = None, timeout: float = 15):
+        """GET url without reading the body, the host slot is held until the block exits"""
+        trial = self._admit(url)
+        with self._host_slot(url):
+            response = self._send(url, headers, timeout, stream=True, trial=trial)
+            try:
+                yield response
+            finally:
+                response.close()
+
+
+def _retry_after(value: Optional[str], default: float = 30) -> float:
+    """Seconds from a Retry-After header, HTTP dates fall back to default"""
+    try:
+        return min(float(value), 600.0)
+    except (TypeError, ValueError):
+        return default
+
+
+# One pool for the whole process so repeat fetches to a host reuse connections
+http_client = HttpClient()
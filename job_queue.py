@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class JobQueue:
+    """SQLite-backed queue of research jobs shared by worker processes
+
+    A job moves from queued to running when a worker claims it and to done or
+    failed when the worker reports back; the result record is stored in the
+    job's row. Failed attempts are queued again after retry_delay seconds,
+    doubling each time, until max_attempts is reached. A claim holds a lease
+    of lease seconds, so jobs of a worker that died are picked up again once
+    it expires. Every state change runs in a write transaction (BEGIN
+    IMMEDIATE), so any number of processes can share one queue file.
+    """
+
+    def __init__(self, path: str = ".job_queue.sqlite", lease: float = 900, retry_delay: float = 30):
+        self.path = path
+        self.lease = lease
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        # Autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY, query TEXT, status TEXT, attempts INTEGER DEFAULT 0, max_attempts INTEGER,"
+            " available_at REAL, worker TEXT, lease_until REAL, result TEXT, error TEXT,"
+            " created_at REAL, finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+
+    def _transaction(self, func):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = func()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return value
+
+    def submit(self, queries: Iterable[str], max_attempts: int = 3) -> List[int]:
+        """Queue one job per query, returns their ids"""
+        now = time.time()
+
+        def insert():
+            return [
+                self._conn.execute(
+                    "INSERT INTO jobs (query, status, max_attempts, available_at, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                    (query, max_attempts, now, now),
+                ).lastrowid
+                for query in queries
+            ]
+        return self._transaction(insert)
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Take the oldest job that is ready to run, or None when there is none"""
+        now = time.time()
+
+        def take():
+            # Jobs whose worker stopped reporting count as a failed attempt
+            self._conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,"
+                " error = 'worker lease expired', worker = NULL, finished_at = CASE WHEN attempts >= max_attempts THEN ? END"
+                " WHERE status = 'running' AND lease_until < ?",
+                (now, now),
+            )
+            row = self._conn.execute(
+                "SELECT id, query, attempts FROM jobs WHERE status = 'queued' AND available_at <= ?"
+                " ORDER BY available_at, id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ? WHERE id = ?",
+                (worker, now + self.lease, row[0]),
+            )
+            return {"id": row[0], "query": row[1], "attempt": row[2] + 1}
+        return self._transaction(take)
+
+    def complete(self, job_id: int, result: Dict):
+        self._transaction(lambda: self._conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, worker = NULL, finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id),
+        ))
+
+    def fail(self, job_id: int, error: str, result: Optional[Dict] = None) -> bool:
+        """Record a failed attempt, returns True if the job will be retried"""
+        now = time.time()
+
+        def update():
+            attempts, max_attempts = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            retry = attempts < max_attempts
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, result = ?, worker = NULL, available_at = ?, finished_at = ?"
+                " WHERE id = ?",
+                (
+                    "queued" if retry else "failed",
+                    error,
+                    json.dumps(result) if result is not None else None,
+                    now + self.retry_delay * 2 ** (attempts - 1) if retry else now,
+                    None if retry else now,
+                    job_id,
+                ),
+            )
+            return retry
+        return self._transaction(update)
+
+    def release(self, job_id: int):
+        """Put a claimed job back without counting the attempt, e.g. on shutdown"""
+        self._transaction(lambda: self._conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL, available_at = ?"
+            " WHERE id = ? AND status = 'running'",
+            (time.time(), job_id),
+        ))
+
+    def release_worker(self, worker: str) -> int:
+        """Release every job still held by worker, e.g. after it was killed"""
+        def update():
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL, available_at = ?"
+                " WHERE worker = ? AND status = 'running'",
+                (time.time(), worker),
+            ).rowcount
+        return self._transaction(update)
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, query, status, attempts, result, error, created_at, finished_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def finished(self, since: float = 0) -> List[Dict]:
+        """Done and failed jobs with their results, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, query, status, attempts, result, error, created_at, finished_at FROM jobs"
+                " WHERE status IN ('done', 'failed') AND finished_at >= ? ORDER BY finished_at",
+                (since,),
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    @staticmethod
+    def _job(row) -> Dict:
+        job_id, query, status, attempts, result, error, created_at, finished_at = row
+        return {
+            "id": job_id,
+            "query": query,
+            "status": status,
+            "attempts": attempts,
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "finished_at": finished_at,
+        }
+
+    def pending(self) -> int:
+        """Jobs that are queued or running"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        return counts
+
+
+def get_queue(path: Optional[str] = None) -> JobQueue:
+    return JobQueue(path or os.getenv("JOB_QUEUE_PATH", ".job_queue.sqlite"))
@@ -0,0 +1,185 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from context_packing import split_passages, tokenize
+
+
+def chunk_text(text: str, target_chars: int = 800) -> List[str]:
+    """Passages of roughly target_chars, short paragraphs are merged with their neighbours"""
+    chunks, current = [], ""
+    for passage in split_passages(text, target_chars=target_chars):
+        current = f"{current}\n{passage}" if current else passage
+        if len(current) >= target_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _title_of(url: str, text: str) -> str:
+    match = re.search(r"^Title:\s*(.+)$", text, re.MULTILINE)
+    return match.group(1).strip() if match else url
+
+
+class LocalCorpus:
+    """Full-text index of every page, article and PDF the tools have read
+
+    Documents are keyed by URL (a re-fetch replaces the old text) and split
+    into passages stored in an SQLite FTS5 table, so search() is a ranked
+    BM25 lookup over everything fetched so far that takes milliseconds.
+    Each document's passages occupy a contiguous rowid range recorded in the
+    documents table, so replacing or pruning a document deletes by rowid.
+    Documents older than max_age seconds, and the oldest beyond
+    max_documents, are pruned every prune_every additions. If the SQLite
+    build lacks FTS5 the corpus is disabled rather than failing.
+    """
+
+    def __init__(
+        self,
+        path: str = ".local_corpus.sqlite",
+        max_passages_per_doc: int = 40,
+        max_documents: int = 5000,
+        max_age: float = 90 * 24 * 3600,
+        prune_every: int = 100,
+    ):
+        self.path = path
+        self.max_passages_per_doc = max_passages_per_doc
+        self.max_documents = max_documents
+        self.max_age = max_age
+        self.prune_every = prune_every
+        self._adds = 0
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._available = False
+        self._open_lock = threading.Lock()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the module creates no files
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS documents ("
+                        " id INTEGER PRIMARY KEY, url TEXT UNIQUE, title TEXT, kind TEXT, fetched_at REAL, chars INTEGER,"
+                        " first_rowid INTEGER, passage_count INTEGER)"
+                    )
+                    # Corpora created before rowid ranges were tracked
+                    columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+                    if "first_rowid" not in columns:
+                        conn.execute("ALTER TABLE documents ADD COLUMN first_rowid INTEGER")
+                        conn.execute("ALTER TABLE documents ADD COLUMN passage_count INTEGER")
+                    conn.execute("CREATE INDEX IF NOT EXISTS documents_fetched_at ON documents (fetched_at)")
+                    try:
+                        conn.execute(
+                            "CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5("
+                            " text, doc_id UNINDEXED, position UNINDEXED, tokenize = 'porter unicode61')"
+                        )
+                        self._available = True
+                    except sqlite3.OperationalError:
+                        self._available = False
+                    conn.commit()
+                    self._connection = conn
+        return self._connection
+
+    @property
+    def available(self) -> bool:
+        """Whether this SQLite build has FTS5"""
+        self._conn
+        return self._available
+
+    def add(self, url: str, text: str, kind: str = "page", title: Optional[str] = None):
+        """Index text fetched from url, replacing what was stored for it before"""
+        if not self.available or not text or text.startswith("Error"):
+            return
+        passages = chunk_text(text)[:self.max_passages_per_doc]
+        with self._lock:
+            self._delete(self._conn.execute(
+                "SELECT id, first_rowid, passage_count FROM documents WHERE url = ?", (url,)
+            ).fetchall())
+            # Explicit rowids keep the document's passages in one range
+            first_rowid = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM passages").fetchone()[0]
+            doc_id = self._conn.execute(
+                "INSERT INTO documents (url, title, kind, fetched_at, chars, first_rowid, passage_count)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, title or _title_of(url, text), kind, time.time(), len(text), first_rowid, len(passages)),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO passages (rowid, text, doc_id, position) VALUES (?, ?, ?, ?)",
+                [(first_rowid + position, passage, doc_id, position) for position, passage in enumerate(passages)],
+            )
+            self._adds += 1
+            if self._adds % self.prune_every == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _delete(self, documents: List[tuple]):
+        """Remove (id, first_rowid, passage_count) documents and their passages, lock held"""
+        for doc_id, first_rowid, count in documents:
+            if first_rowid is None:
+                # Rows from before rowid ranges were tracked, found by a full scan
+                self._conn.execute("DELETE FROM passages WHERE doc_id = ?", (doc_id,))
+            elif count:
+                self._conn.execute(
+                    "DELETE FROM passages WHERE rowid BETWEEN ? AND ?", (first_rowid, first_rowid + count - 1)
+                )
+            self._conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def _prune(self):
+        """Drop documents past max_age and the oldest beyond max_documents, lock held"""
+        self._delete(self._conn.execute(
+            "SELECT id, first_rowid, passage_count FROM documents WHERE fetched_at < ? OR id IN ("
+            " SELECT id FROM documents ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+            (time.time() - self.max_age, self.max_documents),
+        ).fetchall())
+
+    def search(self, query: str, limit: int = 5, per_document: int = 2) -> List[Dict]:
+        """Best matching passages, at most per_document from any one URL"""
+        terms = tokenize(query)
+        if not self.available or not terms:
+            return []
+        # Quoted terms OR-ed together, BM25 rewards passages that match more of them
+        match = " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.url, d.title, d.kind, d.fetched_at, p.text, bm25(passages) AS score"
+                " FROM passages p JOIN documents d ON d.id = p.doc_id"
+                " WHERE passages MATCH ? ORDER BY score LIMIT ?",
+                (match, limit * per_document * 4),
+            ).fetchall()
+
+        results, per_url = [], {}
+        for url, title, kind, fetched_at, text, score in rows:
+            if per_url.get(url, 0) >= per_document:
+                continue
+            per_url[url] = per_url.get(url, 0) + 1
+            results.append({
+                "url": url,
+                "title": title,
+                "kind": kind,
+                "fetched_at": fetched_at,
+                "passage": text,
+                # FTS5's bm25() is lower for better matches
+                "score": -score,
+            })
+            if len(results) >= limit:
+                break
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            documents, chars = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(chars), 0) FROM documents").fetchone()
+        return {"documents": documents, "chars": chars}
+
+
+local_corpus = LocalCorpus(
+    os.getenv("LOCAL_CORPUS_PATH", ".local_corpus.sqlite"),
+    max_documents=int(os.getenv("LOCAL_CORPUS_MAX_DOCUMENTS", 5000)),
+    max_age=float(os.getenv("LOCAL_CORPUS_MAX_AGE_DAYS", 90)) * 24 * 3600,
+)
@@ -1,46 +1,21 @@
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.agents import create_tool_calling_agent, AgentExecutor
-from typing import List, Dict, Optional
+import asyncio
 import json
+import threading
 import time
+from prefetcher import prefetcher
+from query_cache import query_cache
+from structured_output import ResearchResponse, finalize_research
+from tracing import start_trace
 
-# Import enhanced tools
-from tools import (
-    save_tool,
-    save_json_tool,
-    advanced_search_tool,
-    web_scrape_tool,
-    article_extract_tool,
-    pdf_extract_tool,
-    arxiv_search_tool,
-    multi_source_research_tool,
-    wiki_tool  # Deprioritized but still available
-)
+# Import enhanced tools (LangChain objects are built lazily by get_tools)
+from tools import save_to_json, get_tools
 
 # Load environment variables
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
 
-# Enhanced response model
-class ResearchResponse(BaseModel):
-    topic: str = Field(description="The main research topic")
-    summary: str = Field(description="A comprehensive summary of the research findings")
-    key_points: List[str] = Field(description="Key points or findings from the research")
-    sources: List[Dict[str, str]] = Field(description="Sources used in the research with title and URL")
-    tools_used: List[str] = Field(description="Tools used during the research process")
-
-# Setup LLM with higher temperature for more creative synthesis
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-pro", 
-    google_api_key=api_key,
-    temperature=0.3,  # Slightly higher for better synthesis
-    max_output_tokens=4096
-)
-
 # Enhanced system prompt prioritizing diverse sources
 system_prompt = """
 You are an advanced research assistant that produces comprehensive, accurate, and well-sourced information similar to ChatGPT, DeepSeek, and Perplexity's research mode.
@@ -54,13 +29,14 @@ RESEARCH GUIDELINES:
 6. Be objective and present multiple viewpoints when relevant.
 
 RESEARCH PROCESS:
-1. START WITH THE MULTI-SOURCE RESEARCH TOOL to gather broad information from diverse sources.
-2. Use ADVANCED SEARCH to find specific information not covered by the initial research.
-3. For specific websites, use WEB SCRAPING to extract more detailed information.
-4. For academic topics, use ARXIV SEARCH to find scholarly articles.
-5. Extract content from PDFs when necessary using the PDF EXTRACTION tool.
-6. Use ARTICLE EXTRACTION for in-depth analysis of specific web pages.
-7. Only use WIKIPEDIA as a supplementary source, not as your primary source.
+1. FIRST SEARCH THE LOCAL CORPUS of previously fetched pages. If it already covers the question, build on it and only use the web tools for gaps or newer information.
+2. Use THE MULTI-SOURCE RESEARCH TOOL to gather broad information from diverse sources.
+3. Use ADVANCED SEARCH to find specific information not covered by the initial research.
+4. For specific websites, use WEB SCRAPING to extract more detailed information.
+5. For academic topics, use ARXIV SEARCH to find scholarly articles.
+6. Extract content from PDFs when necessary using the PDF EXTRACTION tool.
+7. Use ARTICLE EXTRACTION for in-depth analysis of specific web pages.
+8. Only use WIKIPEDIA as a supplementary source, not as your primary source.
 
 Your output should be in valid JSON format with the following structure:
 {{
@@ -78,97 +54,180 @@ Your output should be in valid JSON format with the following structure:
 Remember, your goal is to provide high-quality, comprehensive research with diverse sources similar to ChatGPT and Perplexity.
 """
 
-# Create prompt template with correct variables
-prompt = ChatPromptTemplate.from_messages(
-    [
-        ("system", system_prompt),
-        ("human", "{query}"),
-        ("placeholder", "{agent_scratchpad}"),
+# The LLM, agent and executor are built on first use, so startup only pays for what a run needs
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """Shared Gemini chat model, also used to re-ask for malformed answers"""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
+            # Setup LLM with higher temperature for more creative synthesis
+            _llm = ChatGoogleGenerativeAI(
+                model="gemini-1.5-pro", 
+                google_api_key=api_key,
+                temperature=0.3,  # Slightly higher for better synthesis
+                max_output_tokens=4096
+            )
+        return _llm
+
+def build_agent_executor(llm=None, verbose: bool = True):
+    """Build a new agent stack, llm defaults to Gemini (benchmarks pass a fake model)"""
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain.agents import create_tool_calling_agent
+    from budgeted_executor import BudgetedAgentExecutor
+    
+    if llm is None:
+        llm = get_llm()
+    
+    # Create prompt template with correct variables
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", system_prompt),
+            ("human", "{query}"),
+            ("placeholder", "{agent_scratchpad}"),
+        ]
+    )
+
+    # Include all tools with multi-source research prioritized
+    toolbox = get_tools()
+    tools = [
+        toolbox["local_corpus_tool"],           # Known material first, no network needed
+        toolbox["multi_source_research_tool"],  # Prioritize this tool for comprehensive research
+        toolbox["advanced_search_tool"],        # Secondary priority for search
+        toolbox["article_extract_tool"],        # For detailed article extraction
+        toolbox["web_scrape_tool"],             # For general web scraping
+        toolbox["arxiv_search_tool"],           # For academic research
+        toolbox["pdf_extract_tool"],            # For PDF extraction
+        toolbox["wiki_tool"],                   # Deprioritized but still available
+        toolbox["save_tool"],
+        toolbox["save_json_tool"]
     ]
-)
-
-# Include all tools with multi-source research prioritized
-tools = [
-    multi_source_research_tool,  # Prioritize this tool for comprehensive research
-    advanced_search_tool,        # Secondary priority for search
-    article_extract_tool,        # For detailed article extraction
-    web_scrape_tool,             # For general web scraping
-    arxiv_search_tool,           # For academic research
-    pdf_extract_tool,            # For PDF extraction
-    wiki_tool,                   # Deprioritized but still available
-    save_tool,
-    save_json_tool
-]
-
-# Create agent
-agent = create_tool_calling_agent(
-    llm=llm,
-    prompt=prompt,
-    tools=tools
-)
-
-# Create agent executor with higher timeout and iterations
-agent_executor = AgentExecutor(
-    agent=agent,
-    tools=tools,
-    verbose=True,
-    max_iterations=15,  # Increased for more thorough research
-    handle_parsing_errors=True,
-    early_stopping_method="generate",  # Better handling of completion
-    max_execution_time=300  # 5 minutes max execution time
-)
-
-def run_research():
-    query = input("What can I help you research? ")
+
+    # Create agent
+    agent = create_tool_calling_agent(
+        llm=llm,
+        prompt=prompt,
+        tools=tools
+    )
+
+    # Create agent executor, the evidence budget decides when to stop gathering
+    agent_executor = BudgetedAgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=verbose,
+        max_iterations=20,  # Hard cap, past 10 iterations only runs that still find new information continue
+        handle_parsing_errors=True,
+        early_stopping_method="force",  # Tool-calling agents only support "force", the executor synthesizes the answer
+        max_execution_time=300,  # 5 minutes max execution time
+        synthesis_llm=llm,
+        soft_max_iterations=10,
+    )
     
-    print("\nResearching your topic using multiple web sources. This may take a few minutes...\n")
-    start_time = time.time()
+    return agent_executor
+
+_agent_executor = None
+_agent_executor_lock = threading.Lock()
+
+def get_agent_executor():
+    """Shared agent stack, built once per process and reused across queries"""
+    global _agent_executor
+    with _agent_executor_lock:
+        if _agent_executor is None:
+            _agent_executor = build_agent_executor()
+        return _agent_executor
+
+def export_trace(tracer):
+    """Write the run's spans to RESEARCH_TRACE_DIR when it is set"""
+    trace_dir = os.getenv("RESEARCH_TRACE_DIR")
+    if trace_dir:
+        tracer.export_jsonl(os.path.join(trace_dir, "spans.jsonl"))
+        with open(os.path.join(trace_dir, f"{tracer.trace_id}.otlp.json"), "w", encoding="utf-8") as f:
+            json.dump(tracer.to_otlp(), f)
+
+def extract_output_text(raw_response) -> str:
+    """Pull the final answer text out of an agent_executor response"""
+    if isinstance(raw_response, dict) and "output" in raw_response:
+        if isinstance(raw_response["output"], str):
+            return raw_response["output"]
+        elif isinstance(raw_response["output"], list) and len(raw_response["output"]) > 0:
+            if isinstance(raw_response["output"][0], dict) and "text" in raw_response["output"][0]:
+                return raw_response["output"][0]["text"]
+            else:
+                return str(raw_response["output"][0])
+        else:
+            return str(raw_response["output"])
+    else:
+        return str(raw_response)
+
+def run_research(stream: bool = True):
+    query = input("What can I help you research? ")
+    streamed = False
     
     try:
-        # Execute the agent
-        raw_response = agent_executor.invoke({"query": query})
-        
-        # Calculate research time
-        research_time = time.time() - start_time
-        print(f"\nResearch completed in {research_time:.2f} seconds")
-        
-        # Extract the response
-        if isinstance(raw_response, dict) and "output" in raw_response:
-            if isinstance(raw_response["output"], str):
-                output_text = raw_response["output"]
-            elif isinstance(raw_response["output"], list) and len(raw_response["output"]) > 0:
-                if isinstance(raw_response["output"][0], dict) and "text" in raw_response["output"][0]:
-                    output_text = raw_response["output"][0]["text"]
-                else:
-                    output_text = str(raw_response["output"][0])
-            else:
-                output_text = str(raw_response["output"])
+        # Repeated questions (and near-duplicates, if enabled) are answered from the query cache
+        cached_result = query_cache.get(query)
+        if cached_result is not None:
+            print(f"\nFound a recent result for a matching query (cache: {query_cache.stats()})")
+            output_text = json.dumps(cached_result)
+            llm = None
         else:
-            output_text = str(raw_response)
-        
-        # Try to parse the response as JSON
-        try:
-            # Find JSON in the output text if it's embedded
-            json_start = output_text.find('{')
-            json_end = output_text.rfind('}') + 1
+            print("\nResearching your topic using multiple web sources. This may take a few minutes...\n")
+            start_time = time.time()
             
-            if json_start >= 0 and json_end > json_start:
-                json_text = output_text[json_start:json_end]
-                result = json.loads(json_text)
-            else:
-                # If no JSON found, try direct parsing
-                result = json.loads(output_text)
+            # Execute the agent asynchronously so tool calls from the same turn run concurrently
+            from tracing_callbacks import TracingCallbackHandler
+            
+            tracer = start_trace()
+            config = {"callbacks": [TracingCallbackHandler(tracer)]}
+            if stream:
+                # Show tool progress, sources and the answer while the agent is still working
+                from streaming import StreamPrinter, print_stream
                 
-            # Print formatted response
-            print("\n" + "="*50)
-            print(f"RESEARCH RESULTS: {result.get('topic', 'Research Topic')}")
-            print("="*50)
-            print(f"\nSUMMARY:\n{result.get('summary', 'No summary available')}")
+                printer = StreamPrinter()
+                raw_response = asyncio.run(print_stream(get_agent_executor(), query, config=config, printer=printer))
+                streamed = printer.answered
+            else:
+                raw_response = asyncio.run(get_agent_executor().ainvoke({"query": query}, config=config))
+            
+            # Calculate research time
+            research_time = time.time() - start_time
+            print(f"\nResearch completed in {research_time:.2f} seconds")
+            if stream and printer.first_output is not None:
+                print(f"First output after {printer.first_output:.2f} seconds")
+            print(tracer.format_summary())
+            prefetch = prefetcher.stats()
+            if prefetch["scheduled"]:
+                print(
+                    f"  Prefetched {prefetch['completed']} of {prefetch['scheduled']} pages "
+                    f"({prefetch['bytes'] / 1024:.0f} KB), {prefetch['hits']} used, hit rate {prefetch['hit_rate']:.0%}"
+                )
+            export_trace(tracer)
             
-            if 'key_points' in result and result['key_points']:
-                print("\nKEY POINTS:")
-                for i, point in enumerate(result['key_points'], 1):
-                    print(f"{i}. {point}")
+            # Extract the response
+            output_text = extract_output_text(raw_response)
+            llm = get_llm()
+        
+        # Validate against ResearchResponse, repairing locally and re-asking the model once if needed
+        try:
+            result = asyncio.run(finalize_research(output_text, query, llm)).model_dump()
+            if cached_result is None:
+                query_cache.put(query, result)
+                
+            # Print formatted response, a streamed answer already showed topic, summary and key points
+            if not streamed:
+                print("\n" + "="*50)
+                print(f"RESEARCH RESULTS: {result.get('topic', 'Research Topic')}")
+                print("="*50)
+                print(f"\nSUMMARY:\n{result.get('summary', 'No summary available')}")
+                
+                if 'key_points' in result and result['key_points']:
+                    print("\nKEY POINTS:")
+                    for i, point in enumerate(result['key_points'], 1):
+                        print(f"{i}. {point}")
             
             if 'sources' in result and result['sources']:
                 print("\nSOURCES:")
@@ -186,16 +245,14 @@ def run_research():
                     print(f"- {tool}")
             
             # Save results
-            save_to_json = input("\nWould you like to save these results to a JSON file? (y/n): ").lower()
-            if save_to_json == 'y':
-                filename = input("Enter filename (default: research_output.json): ") or "research_output.json"
-                with open(filename, "w", encoding="utf-8") as f:
-                    json.dump(result, f, indent=2)
-                print(f"Results saved to {filename}")
+            save_results = input("\nWould you like to save these results to a JSON file? (y/n): ").lower()
+            if save_results == 'y':
+                filename = input("Enter filename (default: research_output.jsonl): ") or "research_output.jsonl"
+                print(save_to_json(dict(result), filename))
             
             return result
             
-        except json.JSONDecodeError as e:
+        except ValueError as e:
             print(f"Error parsing JSON: {e}")
             print("Raw response:")
             print(output_text[:500] + "..." if len(output_text) > 500 else output_text)
@@ -215,4 +272,8 @@ def run_research():
         return {"error": str(e)}
 
 if __name__ == "__main__":
-    run_research()
\ No newline at end of file
+    import sys
+    
+    run_research(stream="--no-stream" not in sys.argv[1:])
+    # Don't keep the process alive for speculative downloads nobody will read
+    prefetcher.shutdown()
\ No newline at end of file
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "ref_src")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL used as the cache key"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class PageCache:
+    """On-disk cache of raw responses and extracted text, keyed by normalized URL
+
+    Each entry is a directory holding meta.json, the raw body and one text file
+    per extractor ("scrape", "article", "pdf"). Entries older than ttl are
+    revalidated with ETag/Last-Modified when possible, and the least recently
+    used entries are evicted once the cache grows past max_bytes. Writes add
+    to a running size estimate, so the directory is only scanned when that
+    passes max_bytes or every evict_every writes.
+    """
+
+    def __init__(
+        self,
+        directory: str = ".page_cache",
+        ttl: float = 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        evict_every: int = 500,
+    ):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._lock = threading.Lock()
+        # Bytes on disk as of the last scan plus what was written since, None before the first scan
+        self._size: Optional[int] = None
+        self._writes = 0
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+    # Paths
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, url: str) -> str:
+        return os.path.join(self.directory, self._key(url))
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    # Reads
+    def get_meta(self, url: str) -> Optional[dict]:
+        """Metadata of the cached entry for url, fresh or not"""
+        try:
+            with open(os.path.join(self._entry_dir(url), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_fresh(self, meta: Optional[dict]) -> bool:
+        return bool(meta) and time.time() - meta.get("fetched_at", 0) < self.ttl
+
+    def get_text(self, url: str, kind: str, allow_stale: bool = False) -> Optional[str]:
+        """Cached extracted text for url, or None on a miss"""
+        meta = self.get_meta(url)
+        if meta is None or (not allow_stale and not self.is_fresh(meta)):
+            self._count("misses")
+            return None
+
+        entry_dir = self._entry_dir(url)
+        try:
+            with open(os.path.join(entry_dir, f"{kind}.txt"), "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            self._count("misses")
+            return None
+
+        # Touch meta.json so eviction sees this entry as recently used
+        try:
+            os.utime(os.path.join(entry_dir, "meta.json"))
+        except OSError:
+            pass
+        self._count("hits")
+        return text
+
+    def raw_path(self, url: str, allow_stale: bool = False) -> Optional[str]:
+        """Path of the cached raw body for url, for readers that should not load it into memory"""
+        meta = self.get_meta(url)
+        if meta is None or (not allow_stale and not self.is_fresh(meta)):
+            return None
+        path = os.path.join(self._entry_dir(url), "raw")
+        return path if os.path.exists(path) else None
+
+    def get_raw(self, url: str, allow_stale: bool = False) -> Optional[bytes]:
+        """Cached raw response body for url"""
+        path = self.raw_path(url, allow_stale=allow_stale)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating a stale entry"""
+        meta = self.get_meta(url) or {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    # Writes
+    def mark_revalidated(self, url: str):
+        """Record a 304 Not Modified answer, the entry becomes fresh again"""
+        meta = self.get_meta(url)
+        if meta is None:
+            return
+        meta["fetched_at"] = time.time()
+        self._write_atomic(os.path.join(self._entry_dir(url), "meta.json"), json.dumps(meta).encode("utf-8"))
+        self._count("revalidated")
+
+    def put_raw(self, url: str, raw: bytes, headers: Optional[dict] = None):
+        """Store a freshly downloaded body with its validators"""
+        self._store_raw(url, headers, lambda path: self._write_atomic(path, raw))
+
+    def put_raw_file(self, url: str, source_path: str, headers: Optional[dict] = None) -> str:
+        """Move a body spooled to disk into the cache and return its new path"""
+        self._store_raw(url, headers, lambda path: shutil.move(source_path, path))
+        return os.path.join(self._entry_dir(url), "raw")
+
+    def _store_raw(self, url: str, headers: Optional[dict], write_body):
+        entry_dir = self._entry_dir(url)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        # A new body invalidates text extracted from the previous one
+        for name in os.listdir(entry_dir):
+            if name.endswith(".txt"):
+                os.remove(os.path.join(entry_dir, name))
+        write_body(os.path.join(entry_dir, "raw"))
+
+        headers = headers or {}
+        meta = {
+            "url": normalize_url(url),
+            "fetched_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "content_type": headers.get("Content-Type"),
+        }
+        self._write_atomic(os.path.join(entry_dir, "meta.json"), json.dumps(meta).encode("utf-8"))
+        self._count("stores")
+
+        try:
+            added = os.path.getsize(os.path.join(entry_dir, "raw"))
+        except OSError:
+            added = 0
+        self._maybe_evict(added)
+
+    def put_text(self, url: str, kind: str, text: str):
+        """Store text extracted by one of the fetch tools"""
+        entry_dir = self._entry_dir(url)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        if self.get_meta(url) is None:
+            meta = {"url": normalize_url(url), "fetched_at": time.time()}
+            self._write_atomic(os.path.join(entry_dir, "meta.json"), json.dumps(meta).encode("utf-8"))
+        data = text.encode("utf-8")
+        self._write_atomic(os.path.join(entry_dir, f"{kind}.txt"), data)
+        self._count("stores")
+        self._maybe_evict(len(data))
+
+    # Eviction
+    def _maybe_evict(self, added: int):
+        # Overwrites are counted again, which only makes the next scan come sooner
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += added
+            due = self._size is None or self._size > self.max_bytes or self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries that cannot be revalidated, then LRU entries once past max_bytes"""
+        if not os.path.isdir(self.directory):
+            return
+
+        entries = []
+        total = 0
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            meta_path = os.path.join(entry.path, "meta.json")
+            try:
+                last_used = os.path.getmtime(meta_path)
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            except (OSError, json.JSONDecodeError):
+                continue
+
+            expired = now - meta.get("fetched_at", 0) >= self.ttl
+            if expired and not (meta.get("etag") or meta.get("last_modified")):
+                self._remove(entry.path)
+                continue
+            entries.append((last_used, size, entry.path))
+            total += size
+
+        # Evict down to 90% so the next writes don't trigger another scan right away
+        target = self.max_bytes * 0.9 if total > self.max_bytes else self.max_bytes
+        entries.sort()
+        for last_used, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+
+        with self._lock:
+            self._size = total
+
+    def _remove(self, path: str):
+        shutil.rmtree(path, ignore_errors=True)
+        self._count("evictions")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+# Shared by scrape_webpage, extract_article_content and extract_text_from_pdf_url
+page_cache = PageCache(os.getenv("PAGE_CACHE_DIR", ".page_cache"))
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+from http_client import http_client
+from page_cache import page_cache
+from tracing import record
+
+# Hard cap on how much of a PDF is ever downloaded
+MAX_PDF_BYTES = 25 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# One download per URL at a time, so a background prefetch and a tool call don't both fetch it
+_spool_locks = weakref.WeakValueDictionary()
+_spool_locks_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily start the process pool used for PDF parsing"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=2)
+        return _pool
+
+
+def spool_pdf(url: str, max_bytes: int = MAX_PDF_BYTES, timeout: int = 10) -> str:
+    """Stream a PDF to disk in chunks and return the path of the cached file"""
+    with _spool_locks_lock:
+        lock = _spool_locks.get(url)
+        if lock is None:
+            lock = threading.Lock()
+            _spool_locks[url] = lock
+    with lock:
+        return _spool_pdf(url, max_bytes, timeout)
+
+
+def _spool_pdf(url: str, max_bytes: int, timeout: int) -> str:
+    cached_path = page_cache.raw_path(url)
+    if cached_path is not None:
+        record("cache_hits")
+        return cached_path
+
+    with http_client.stream(url, headers=page_cache.conditional_headers(url), timeout=timeout) as response:
+        if response.status_code != 304:
+            return _spool_response(url, response, max_bytes)
+        cached_path = page_cache.raw_path(url, allow_stale=True)
+        if cached_path is not None:
+            page_cache.mark_revalidated(url)
+            return cached_path
+
+    # Cached body vanished in the meantime, fetch it unconditionally
+    with http_client.stream(url, timeout=timeout) as response:
+        return _spool_response(url, response, max_bytes)
+
+
+def _spool_response(url: str, response, max_bytes: int) -> str:
+    """Write a successful response body to the page cache in chunks"""
+    response.raise_for_status()
+    if response.status_code == 304:
+        raise ValueError(f"Server answered 304 Not Modified for {url} without a cached copy")
+
+    declared = int(response.headers.get("Content-Length") or 0)
+    if declared > max_bytes:
+        raise ValueError(f"PDF is {declared} bytes, larger than the {max_bytes} byte limit")
+
+    # Spool next to the cache so the finished file can be moved in without copying
+    os.makedirs(page_cache.directory, exist_ok=True)
+    fd, spool_path = tempfile.mkstemp(suffix=".pdf.part", dir=page_cache.directory)
+    try:
+        written = 0
+        with os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise ValueError(f"PDF exceeds the {max_bytes} byte limit")
+                f.write(chunk)
+        # Never cache an empty body as the PDF
+        if written == 0:
+            raise ValueError(f"Empty response body for {url}")
+        record("bytes_downloaded", written)
+        return page_cache.put_raw_file(url, spool_path, response.headers)
+    except BaseException:
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+        raise
+
+
+def extract_pdf_text(path: str, max_pages: int = 20, max_chars: int = 10000) -> Tuple[str, bool]:
+    """Extract text page by page until the page or character budget runs out
+
+    Runs inside the process pool, returns the text and whether it was cut short.
+    """
+    import PyPDF2
+
+    with open(path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        num_pages = len(reader.pages)
+
+        parts = []
+        length = 0
+        for page_num in range(min(max_pages, num_pages)):
+            page_text = (reader.pages[page_num].extract_text() or "") + "\n\n"
+            if length + len(page_text) > max_chars:
+                parts.append(page_text[:max_chars - length])
+                return "".join(parts), True
+            parts.append(page_text)
+            length += len(page_text)
+
+    return "".join(parts), False
+
+
+def extract_pdf_text_in_pool(path: str, max_pages: int = 20, max_chars: int = 10000) -> Tuple[str, bool]:
+    """Run extract_pdf_text in a worker process so parsing does not hold the agent's GIL"""
+    return _get_pool().submit(extract_pdf_text, path, max_pages, max_chars).result()
@@ -0,0 +1,150 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+from page_cache import page_cache
+from tracing import record, start_trace
+
+# True inside prefetch jobs, so the tool function they run doesn't claim its own result
+_in_prefetch: contextvars.ContextVar[bool] = contextvars.ContextVar("in_prefetch", default=False)
+
+
+class Prefetcher:
+    """Speculatively runs extraction tools on URLs the agent is likely to ask for next
+
+    Search tools schedule their top-ranked URLs; background workers run the
+    matching tool function (scrape_webpage, extract_text_from_pdf_url) while
+    the model is thinking. A follow-up call for the same URL claims the
+    result, waiting for it if the job is still running. Results are kept for
+    ttl seconds, and speculative downloads stop once max_bytes_per_minute
+    would be exceeded. stats() reports how many prefetches were used.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        ttl: float = 600,
+        max_pending: int = 16,
+        max_bytes_per_minute: int = 20 * 1024 * 1024,
+        claim_timeout: float = 30,
+    ):
+        self.workers = workers
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self.max_bytes_per_minute = max_bytes_per_minute
+        self.claim_timeout = claim_timeout
+        self.enabled = workers > 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # (kind, url) -> (expires, future)
+        self._entries: Dict[tuple, tuple] = {}
+        # (finished_at, bytes) of recent jobs for the bandwidth cap
+        self._downloads = deque()
+        self._counters = {
+            "scheduled": 0, "skipped_bandwidth": 0, "completed": 0, "failed": 0,
+            "hits": 0, "wasted": 0, "bytes": 0,
+        }
+
+    def _recent_bytes(self, now: float) -> int:
+        while self._downloads and self._downloads[0][0] < now - 60:
+            self._downloads.popleft()
+        return sum(size for _, size in self._downloads)
+
+    def _expire(self, now: float):
+        for key, (expires, future) in list(self._entries.items()):
+            if expires < now and future.done():
+                del self._entries[key]
+                # Downloaded and extracted, but nothing asked for it
+                if not future.cancelled() and future.exception() is None and future.result() is not None:
+                    self._counters["wasted"] += 1
+
+    def schedule(self, urls: Iterable[str], func: Callable[[str], str], kind: str, top_n: int = 2):
+        """Start func on the first top_n urls that aren't cached or already scheduled"""
+        if not self.enabled:
+            return
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+
+            started = 0
+            for url in urls:
+                if started >= top_n or len(self._entries) >= self.max_pending:
+                    break
+                if not url or (kind, url) in self._entries or page_cache.get_text(url, kind) is not None:
+                    continue
+                future = self._executor.submit(contextvars.Context().run, self._run, url, func)
+                self._entries[(kind, url)] = (now + self.ttl, future)
+                self._counters["scheduled"] += 1
+                started += 1
+
+    def _run(self, url: str, func: Callable[[str], str]) -> Optional[str]:
+        with self._lock:
+            if self._recent_bytes(time.time()) >= self.max_bytes_per_minute:
+                self._counters["skipped_bandwidth"] += 1
+                return None
+
+        # A private trace collects the bytes this job downloads
+        _in_prefetch.set(True)
+        tracer = start_trace()
+        result = func(url)
+        downloaded = int(tracer.summary()["counters"].get("bytes_downloaded", 0))
+
+        with self._lock:
+            self._downloads.append((time.time(), downloaded))
+            self._counters["bytes"] += downloaded
+            failed = not isinstance(result, str) or result.startswith("Error")
+            self._counters["failed" if failed else "completed"] += 1
+        return None if failed else result
+
+    def claim(self, url: str, kind: str) -> Optional[str]:
+        """The prefetched result for url, waiting for a running job; None when there is none"""
+        if _in_prefetch.get():
+            return None
+        with self._lock:
+            entry = self._entries.pop((kind, url), None)
+        if entry is None:
+            return None
+
+        expires, future = entry
+        # Not started yet, the caller is about to do the same work itself
+        if future.cancel():
+            return None
+        try:
+            result = future.result(timeout=self.claim_timeout)
+        except Exception:
+            # Still running after claim_timeout, or the job itself failed
+            result = None
+        if result is None or expires < time.time():
+            return None
+
+        with self._lock:
+            self._counters["hits"] += 1
+        record("prefetch_hits")
+        return result
+
+    def shutdown(self):
+        """Drop queued jobs and stop the workers without waiting for running ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._entries.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            counters = dict(self._counters)
+        finished = counters["completed"]
+        counters["hit_rate"] = round(counters["hits"] / finished, 3) if finished else 0.0
+        return counters
+
+
+prefetcher = Prefetcher(
+    workers=int(os.getenv("PREFETCH_WORKERS", 2)),
+    max_bytes_per_minute=int(os.getenv("PREFETCH_MAX_BYTES_PER_MINUTE", 20 * 1024 * 1024)),
+)
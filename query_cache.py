@@ -0,0 +1,172 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "about", "what", "are", "is",
+    "was", "were", "how", "why", "which", "with", "me", "tell", "give", "please", "explain", "do", "does",
+}
+
+
+def normalize_query(query: str) -> str:
+    """Exact-match cache key: lowercase words without punctuation"""
+    return " ".join(re.findall(r"[a-z0-9]+", query.lower()))
+
+
+def query_terms(query: str) -> list:
+    """Content words of a query for the similarity index"""
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", query.lower()):
+        if word in STOPWORDS:
+            continue
+        # Crude plural folding is enough for short queries
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class QueryCache:
+    """SQLite-backed cache of finished research results keyed by normalized query
+
+    Results older than ttl are ignored and removed, the least recently used
+    entries are evicted past max_entries. Only identical normalized queries
+    match by default; with similarity_threshold set, a TF-IDF cosine match
+    over past queries also serves near-duplicates. A false near-match returns
+    another question's answer, so keep the threshold high.
+    """
+
+    def __init__(
+        self,
+        path: str = ".query_cache.sqlite",
+        ttl: float = 6 * 3600,
+        max_entries: int = 1000,
+        similarity_threshold: Optional[float] = None,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._open_lock = threading.Lock()
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the module creates no files
+        if self._connection is None:
+            with self._open_lock:
+                if self._connection is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS results ("
+                        " key TEXT PRIMARY KEY, query TEXT, response TEXT, created_at REAL, last_used REAL)"
+                    )
+                    conn.commit()
+                    self._connection = conn
+        return self._connection
+
+    def _count(self, name: str):
+        self._counters[name] += 1
+
+    def _touch(self, key: str):
+        self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+
+    def _most_similar(self, query: str, rows: list) -> Optional[tuple]:
+        """Row whose query has the highest TF-IDF cosine similarity to query"""
+        documents = [Counter(query_terms(row[1])) for row in rows]
+        target = Counter(query_terms(query))
+        if not target:
+            return None
+
+        # Document frequencies over past queries plus the new one
+        df = Counter()
+        for terms in documents + [target]:
+            df.update(terms.keys())
+        total = len(documents) + 1
+
+        def vector(terms):
+            return {t: count * (math.log((1 + total) / (1 + df[t])) + 1) for t, count in terms.items()}
+
+        def norm(v):
+            return math.sqrt(sum(w * w for w in v.values()))
+
+        target_vec = vector(target)
+        target_norm = norm(target_vec)
+
+        best_row, best_score = None, 0.0
+        for row, terms in zip(rows, documents):
+            if not terms:
+                continue
+            vec = vector(terms)
+            dot = sum(w * vec.get(t, 0.0) for t, w in target_vec.items())
+            score = dot / (target_norm * norm(vec))
+            if score > best_score:
+                best_row, best_score = row, score
+
+        if best_row is not None and best_score >= self.similarity_threshold:
+            return best_row
+        return None
+
+    def get(self, query: str) -> Optional[dict]:
+        """Stored research result for query or a near-duplicate of it, None on a miss"""
+        key = normalize_query(query)
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl,))
+
+            row = self._conn.execute("SELECT key, query, response FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._count("hits")
+            elif self.similarity_threshold is not None:
+                rows = self._conn.execute("SELECT key, query, response FROM results").fetchall()
+                row = self._most_similar(query, rows)
+                if row is not None:
+                    self._count("near_hits")
+
+            if row is None:
+                self._conn.commit()
+                self._count("misses")
+                return None
+
+            self._touch(row[0])
+            return json.loads(row[2])
+
+    def put(self, query: str, response: dict):
+        """Remember the research result for query"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, query, response, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), query, json.dumps(response), now, now),
+            )
+            # Least recently used entries go first once the cache is full
+            evicted = self._conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            self._conn.commit()
+            self._count("stores")
+            self._counters["evictions"] += max(evicted, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+query_cache = QueryCache(
+    os.getenv("QUERY_CACHE_PATH", ".query_cache.sqlite"),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", 6 * 3600)),
+    max_entries=int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 1000)),
+    # Near-duplicate matching is opt-in, e.g. QUERY_CACHE_SIMILARITY=0.9
+    similarity_threshold=float(os.getenv("QUERY_CACHE_SIMILARITY")) if os.getenv("QUERY_CACHE_SIMILARITY") else None,
+)
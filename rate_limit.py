@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+
+def domain_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+class DomainRateLimiter:
+    """Token bucket per domain, shared by every fetch in the process
+
+    Each domain refills at rate requests per second up to burst tokens, so
+    requests to different hosts never wait on each other. With a path the
+    buckets live in SQLite and are updated in a write transaction, so several
+    worker processes share one budget per domain. rate None disables limiting
+    for that domain.
+    """
+
+    def __init__(self, rate: Optional[float] = 1.0, burst: float = 2, path: Optional[str] = None):
+        self.default: Optional[Tuple[float, float]] = (rate, burst) if rate else None
+        self.limits: Dict[str, Optional[Tuple[float, float]]] = {}
+        self.path = path
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._conn = None
+        if path:
+            # Autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE
+            self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS buckets (domain TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+
+    def configure(self, domain: str, rate: Optional[float], burst: float = 1):
+        """Set a domain-specific limit, e.g. arXiv's one request every 3 seconds"""
+        self.limits[domain.lower()] = (rate, burst) if rate else None
+
+    def _limit(self, domain: str) -> Optional[Tuple[float, float]]:
+        return self.limits.get(domain, self.default)
+
+    @staticmethod
+    def _take(state, rate: float, burst: float, now: float, cost: float, cap: float) -> Tuple[Tuple[float, float], float]:
+        # Tokens may go negative, that is the queue of reservations ahead of this caller
+        tokens, updated = state if state else (burst, now)
+        tokens = min(cap, tokens + max(now - updated, 0.0) * rate) - cost
+        return (tokens, now), max(-tokens / rate, 0.0)
+
+    def _reserve(self, domain: str, rate: float, burst: float, cost: float, cap: Optional[float] = None) -> float:
+        cap = burst if cap is None else cap
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                self._buckets[domain], delay = self._take(self._buckets.get(domain), rate, burst, now, cost, cap)
+                return delay
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE domain = ?", (domain,)).fetchone()
+                (tokens, updated), delay = self._take(row, rate, burst, now, cost, cap)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (domain, tokens, updated) VALUES (?, ?, ?)", (domain, tokens, updated)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return delay
+
+    def acquire(self, url: str) -> float:
+        """Block until a request to url's domain is allowed, returns the time slept"""
+        domain = domain_of(url)
+        limit = self._limit(domain)
+        if limit is None:
+            return 0.0
+
+        # Reserve under the lock, sleep outside it
+        delay = self._reserve(domain, limit[0], limit[1], 1.0)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def penalize(self, url: str, seconds: float):
+        """Hold back url's domain for seconds, e.g. after a 429 with Retry-After"""
+        domain = domain_of(url)
+        limit = self._limit(domain)
+        if limit is not None and seconds > 0:
+            self._reserve(domain, limit[0], limit[1], seconds * limit[0], cap=0.0)
+
+
+# Shared by every fetch tool so concurrent calls to one host stay polite
+rate_limiter = DomainRateLimiter(
+    rate=float(os.getenv("RATE_LIMIT_PER_DOMAIN", 1.0)),
+    burst=float(os.getenv("RATE_LIMIT_BURST", 2)),
+    path=os.getenv("RATE_LIMIT_STATE") or None,
+)
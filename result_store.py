@@ -0,0 +1,202 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive inter-process lock held on a sidecar .lock file"""
+    with open(path, "a+b") as lock_file:
+        if os.name == "nt":
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _topic_key(topic) -> str:
+    return " ".join(str(topic or "").lower().split())
+
+
+class ResultStore:
+    """Append-only JSONL store of research results
+
+    Each save appends one line and fsyncs it under a file lock, so concurrent
+    writers never interleave and a crash can at worst leave one partial last
+    line, which readers skip. A sidecar .idx file maps topic and timestamp to
+    byte offsets for lookups without scanning the whole history. The index is
+    loaded into memory, grouped by topic, once per process; later lookups only
+    read the .idx lines appended since.
+    """
+
+    def __init__(self, path: str = "research_output.jsonl"):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.lock_path = path + ".lock"
+        self._thread_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        # topic -> index entries in save order, and how much of the .idx file they cover
+        self._by_topic: Dict[str, List[Dict]] = {}
+        self._index_pos = 0
+        self._indexed_size = 0
+
+    def append(self, record: dict) -> int:
+        """Durably append record and return its byte offset"""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._thread_lock, file_lock(self.lock_path):
+            with open(self.path, "a+b") as f:
+                offset = f.seek(0, os.SEEK_END)
+                # Terminate a partial line left by a crashed writer so this record stays intact
+                if offset:
+                    f.seek(offset - 1)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                        offset += 1
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+            entry = {
+                "topic": _topic_key(record.get("topic")),
+                "timestamp": record.get("timestamp"),
+                "offset": offset,
+                "length": len(line),
+            }
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return offset
+
+    def iter_records(self) -> Iterator[dict]:
+        """Stream every stored record in save order"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial line from an interrupted write
+                    continue
+
+    def _read_index_tail(self) -> List[Dict]:
+        """Index entries written since the last call, index lock held"""
+        entries = []
+        if not os.path.exists(self.index_path):
+            return entries
+        with open(self.index_path, "rb") as f:
+            f.seek(self._index_pos)
+            for line in f:
+                # A line still being written by another process is read next time
+                if not line.endswith(b"\n"):
+                    break
+                self._index_pos += len(line)
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def _reset_index(self, entries: List[Dict]):
+        self._by_topic = {}
+        self._indexed_size = 0
+        self._add_entries(entries)
+
+    def _add_entries(self, entries: List[Dict]):
+        for entry in entries:
+            self._by_topic.setdefault(entry["topic"], []).append(entry)
+            self._indexed_size = max(self._indexed_size, entry["offset"] + entry["length"])
+
+    def _load_index(self) -> Dict[str, List[Dict]]:
+        """Index entries by topic, brought up to date with the data file"""
+        with self._index_lock:
+            self._add_entries(self._read_index_tail())
+            data_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if self._indexed_size == data_size:
+                return self._by_topic
+
+        # Rebuild when the index is missing entries, e.g. after a crash between the two writes
+        entries = self.rebuild_index()
+        with self._index_lock:
+            self._reset_index(entries)
+            self._index_pos = os.path.getsize(self.index_path)
+            return self._by_topic
+
+    def rebuild_index(self) -> List[Dict]:
+        """Recreate the .idx file by scanning the data file"""
+        entries = []
+        with self._thread_lock, file_lock(self.lock_path):
+            if os.path.exists(self.path):
+                with open(self.path, "rb") as f:
+                    offset = 0
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                            entries.append({
+                                "topic": _topic_key(record.get("topic")),
+                                "timestamp": record.get("timestamp"),
+                                "offset": offset,
+                                "length": len(line),
+                            })
+                        except json.JSONDecodeError:
+                            pass
+                        offset += len(line)
+
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.index_path)
+        return entries
+
+    def find(self, topic: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None) -> List[dict]:
+        """Records whose topic contains topic, saved between since and until ("YYYY-MM-DD HH:MM:SS")"""
+        if not os.path.exists(self.path):
+            return []
+
+        wanted = _topic_key(topic) if topic else None
+        by_topic = self._load_index()
+        with self._index_lock:
+            # Only distinct topics are compared, not every saved record
+            candidates = [
+                entry
+                for key, entries in by_topic.items() if not wanted or wanted in key
+                for entry in entries
+            ]
+        candidates.sort(key=lambda entry: entry["offset"])
+
+        matches = []
+        with open(self.path, "rb") as f:
+            for entry in candidates:
+                timestamp = entry.get("timestamp") or ""
+                if since and timestamp < since:
+                    continue
+                if until and timestamp > until:
+                    continue
+                f.seek(entry["offset"])
+                matches.append(json.loads(f.read(entry["length"])))
+        return matches
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path: str = "research_output.jsonl") -> ResultStore:
+    """Shared ResultStore per file so threads in one process reuse the same lock"""
+    with _stores_lock:
+        key = os.path.abspath(path)
+        if key not in _stores:
+            _stores[key] = ResultStore(path)
+        return _stores[key]
@@ -0,0 +1,100 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List
+
+
+class SearchClient:
+    """Reusable DuckDuckGo client returning structured hits
+
+    Results are cached per query for ttl seconds and concurrent requests for
+    the same query share one network call, so research_topic and search_web
+    can be fed by a single search.
+    """
+
+    def __init__(self, ttl: float = 15 * 60, max_entries: int = 256, min_fetch: int = 10):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.min_fetch = min_fetch
+        self._cache = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def _ddgs(self):
+        # DDGS sessions are not shared between threads, each worker keeps its own
+        if not hasattr(self._local, "ddgs"):
+            from duckduckgo_search import DDGS
+            self._local.ddgs = DDGS()
+        return self._local.ddgs
+
+    def _fetch(self, query: str, max_results: int) -> List[Dict]:
+        hits = []
+        for rank, result in enumerate(self._ddgs().text(query, max_results=max_results), 1):
+            hits.append({
+                "title": result.get("title", ""),
+                "url": result.get("href", ""),
+                "snippet": result.get("body", ""),
+                "rank": rank,
+            })
+        return hits
+
+    def search(self, query: str, max_results: int = 5) -> List[Dict]:
+        """Top max_results hits for query as dicts with title, url, snippet and rank"""
+        key = " ".join(query.lower().split())
+        # Always fetch a few extra so smaller follow-up requests are cache hits
+        fetch_size = max(max_results, self.min_fetch)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and time.time() - cached[0] < self.ttl and cached[1] >= fetch_size:
+                self._counters["hits"] += 1
+                return cached[2][:max_results]
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self._counters["misses"] += 1
+            else:
+                self._counters["hits"] += 1
+
+        if not owner:
+            return future.result()[:max_results]
+
+        try:
+            hits = self._fetch(query, fetch_size)
+            future.set_result(hits)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+        with self._lock:
+            self._cache[key] = (time.time(), fetch_size, hits)
+            # Drop the oldest queries once the cache is full
+            while len(self._cache) > self.max_entries:
+                del self._cache[min(self._cache, key=lambda k: self._cache[k][0])]
+
+        return hits[:max_results]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+def format_search_results(hits: List[Dict]) -> str:
+    """Numbered plain-text listing of search hits for the agent"""
+    formatted_results = ""
+    for hit in hits:
+        formatted_results += f"{hit['rank']}. {hit['title']}\n"
+        formatted_results += f"   URL: {hit['url']}\n"
+        formatted_results += f"   Snippet: {hit['snippet']}\n\n"
+    return formatted_results
+
+
+search_client = SearchClient()
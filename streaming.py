@@ -0,0 +1,190 @@
+"""Streaming agent runs: tool progress, discovered sources and the answer as it is generated"""
+import json
+import re
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+URL_RE = re.compile(r"https?://[^\s<>\"'()\[\]]+")
+
+# Answer fields streamed to the user, in the order ResearchResponse declares them
+STREAMED_FIELDS = ("topic", "summary", "key_points")
+
+
+def _tool_argument(args) -> str:
+    """Display form of tool arguments, single-input Tools get theirs as {"__arg1": ...}"""
+    if isinstance(args, dict) and len(args) == 1:
+        args = next(iter(args.values()))
+    return str(args)
+
+
+def chunk_text(chunk) -> str:
+    """Text of a streamed message chunk, Gemini may send a list of content parts"""
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return ""
+
+
+class PartialAnswer:
+    """Incrementally parses the streamed JSON answer and reports what is new
+
+    The accumulated text is re-read with a parser that closes unterminated
+    strings and brackets, so fields can be shown before the JSON is complete.
+    feed() returns (field, index, text) deltas: index is None for strings and
+    the list position for key_points.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.value: Dict[str, Any] = {}
+        self._shown: Dict[Tuple[str, Optional[int]], int] = {}
+
+    def feed(self, text: str) -> List[Tuple[str, Optional[int], str]]:
+        from langchain_core.utils.json import parse_partial_json
+
+        self.text += text
+        start = self.text.find("{")
+        if start < 0:
+            return []
+        try:
+            value = parse_partial_json(self.text[start:])
+        except json.JSONDecodeError:
+            value = None
+        if not isinstance(value, dict):
+            return []
+        self.value = value
+
+        deltas = []
+        for field in STREAMED_FIELDS:
+            current = value.get(field)
+            if isinstance(current, str):
+                deltas.extend(self._delta(field, None, current))
+            elif isinstance(current, list):
+                for index, item in enumerate(current):
+                    if isinstance(item, str):
+                        deltas.extend(self._delta(field, index, item))
+        return deltas
+
+    def _delta(self, field: str, index: Optional[int], current: str) -> List[Tuple[str, Optional[int], str]]:
+        shown = self._shown.get((field, index), 0)
+        if len(current) <= shown:
+            return []
+        self._shown[(field, index)] = len(current)
+        return [(field, index, current[shown:])]
+
+
+async def stream_research(executor, query: str, config: Optional[dict] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """Run the agent and yield (kind, payload) updates as they happen
+
+    Kinds: "tool_start" {name, input}, "tool_end" {name, seconds, error},
+    "source" {url, tool}, "answer" (field, index, text) deltas and finally
+    "final" with the executor's output dict.
+    """
+    started = {}
+    sources = set()
+    # (name, args) of the tool calls in the model's last turn that haven't started yet.
+    # Tool start events don't carry the call id, and for single-input Tools their input is {}.
+    requested: List[Tuple[str, Any]] = []
+    answers: Dict[Any, PartialAnswer] = {}
+
+    async for event in executor.astream_events({"query": query}, config=config, version="v2"):
+        kind = event["event"]
+        data = event.get("data", {})
+
+        if kind == "on_chat_model_end":
+            tool_calls = getattr(data.get("output"), "tool_calls", None)
+            if tool_calls:
+                # Calls the budget blocked never start, a new turn replaces them
+                requested = [(call.get("name"), call.get("args")) for call in tool_calls]
+
+        elif kind == "on_tool_start":
+            started[event["run_id"]] = time.perf_counter()
+            # The executor runs the calls in the order the model made them
+            index = next((i for i, (name, _) in enumerate(requested) if name == event["name"]), None)
+            args = requested.pop(index)[1] if index is not None else None
+            tool_input = data.get("input") or args
+            yield "tool_start", {"name": event["name"], "input": _tool_argument(tool_input)}
+
+        elif kind == "on_tool_end":
+            output = str(getattr(data.get("output"), "content", data.get("output", "")))
+            seconds = time.perf_counter() - started.pop(event["run_id"], time.perf_counter())
+            error = output if output.startswith("Error") else None
+            yield "tool_end", {"name": event["name"], "seconds": seconds, "error": error}
+            for url in URL_RE.findall(output):
+                url = url.rstrip(".,;:")
+                if url not in sources:
+                    sources.add(url)
+                    yield "source", {"url": url, "tool": event["name"]}
+
+        elif kind == "on_chat_model_stream":
+            chunk = data.get("chunk")
+            # Turns that call tools aren't the answer
+            if getattr(chunk, "tool_call_chunks", None):
+                continue
+            text = chunk_text(chunk)
+            if text:
+                answer = answers.setdefault(event["run_id"], PartialAnswer())
+                for delta in answer.feed(text):
+                    yield "answer", delta
+
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            yield "final", data.get("output")
+
+
+class StreamPrinter:
+    """Renders stream_research updates on the terminal"""
+
+    HEADINGS = {"topic": "RESEARCH RESULTS: ", "summary": "\nSUMMARY:\n", "key_points": "\nKEY POINTS:"}
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.started = time.perf_counter()
+        self.first_output: Optional[float] = None
+        self._field = None
+        self._index = None
+        self.answered = False
+
+    def _write(self, text: str):
+        if self.first_output is None:
+            self.first_output = time.perf_counter() - self.started
+        self.out.write(text)
+        self.out.flush()
+
+    def handle(self, kind: str, payload):
+        if kind == "tool_start":
+            self._write(f"-> {payload['name']}: {payload['input'][:80]}\n")
+        elif kind == "tool_end":
+            status = "failed" if payload["error"] else "done"
+            self._write(f"   {payload['name']} {status} in {payload['seconds']:.1f}s\n")
+        elif kind == "source":
+            self._write(f"   source: {payload['url']}\n")
+        elif kind == "answer":
+            field, index, text = payload
+            if not self.answered:
+                self._write("\n" + "=" * 50 + "\n")
+                self.answered = True
+            if field != self._field:
+                if self._field is not None:
+                    self._write("\n")
+                self._write(self.HEADINGS.get(field, f"\n{field.upper()}:\n"))
+                self._field, self._index = field, None
+            if index is not None and index != self._index:
+                self._write(f"\n{index + 1}. ")
+                self._index = index
+            self._write(text)
+        elif kind == "final" and self.answered:
+            self._write("\n" + "=" * 50 + "\n")
+
+
+async def print_stream(executor, query: str, config: Optional[dict] = None, printer: Optional[StreamPrinter] = None):
+    """Stream a run to the terminal and return the executor's final output"""
+    printer = printer or StreamPrinter()
+    output = None
+    async for kind, payload in stream_research(executor, query, config=config):
+        printer.handle(kind, payload)
+        if kind == "final":
+            output = payload
+    return output
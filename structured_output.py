@@ -0,0 +1,194 @@
+"""Turning the agent's final answer into a validated ResearchResponse"""
+import ast
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+# Enhanced response model
+class ResearchResponse(BaseModel):
+    topic: str = Field(description="The main research topic")
+    summary: str = Field(description="A comprehensive summary of the research findings")
+    key_points: List[str] = Field(description="Key points or findings from the research")
+    sources: List[Dict[str, str]] = Field(description="Sources used in the research with title and URL")
+    tools_used: List[str] = Field(description="Tools used during the research process")
+
+
+REASK_PROMPT = """The research below was produced for the query "{query}" but could not be read as the required JSON ({error}).
+Rewrite it as the requested structure without adding, dropping or changing any findings or sources.
+
+{draft}"""
+
+# Cap on how much of a malformed answer is sent back to the model
+MAX_REASK_CHARS = 30000
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _object_span(text: str) -> Optional[str]:
+    """The first {...} object in text by bracket matching, or everything after "{" when it never closes"""
+    start = text.find("{")
+    if start < 0:
+        return None
+    depth, in_string, escaped = 0, False, False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return text[start:]
+
+
+def _replace_outside_strings(text: str, pattern: re.Pattern, replace) -> str:
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text)
+    return "".join(part if i % 2 else pattern.sub(replace, part) for i, part in enumerate(parts))
+
+
+def _close_truncated(text: str) -> str:
+    """Close the strings, arrays and objects left open by an answer that was cut off"""
+    closers, in_string, escaped = [], False, False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]" and closers:
+            closers.pop()
+    if escaped:
+        text = text[:-1]
+    if in_string:
+        text += '"'
+    # A dangling comma, colon or key can't be completed, drop it
+    text = re.sub(r'(,\s*|,?\s*"(?:[^"\\]|\\.)*"\s*:\s*|:\s*)$', "", text.rstrip())
+    if closers and closers[-1] == "}":
+        text = re.sub(r'(?:(?<=\{)|,)\s*"(?:[^"\\]|\\.)*"$', "", text)
+    return text + "".join(reversed(closers))
+
+
+def parse_json_tolerant(text: str) -> Any:
+    """json.loads that also accepts code fences, surrounding prose, trailing commas,
+    smart quotes, Python literals and truncated output; raises ValueError otherwise"""
+    fenced = _FENCE_RE.search(text)
+    candidate = _object_span(fenced.group(1) if fenced else text)
+    if candidate is None:
+        raise ValueError("no JSON object in the response")
+
+    repairs = [
+        lambda s: s,
+        lambda s: _replace_outside_strings(s, _TRAILING_COMMA_RE, r"\1"),
+        lambda s: _replace_outside_strings(
+            s, re.compile(r"\b(True|False|None)\b"), lambda m: _PY_LITERALS[m.group(1)]
+        ),
+        _close_truncated,
+    ]
+    # Repairs accumulate, each one is tried on top of the previous ones. Smart quotes
+    # are only straightened as a last resort since they are legitimate inside strings.
+    error = None
+    for source in (candidate, candidate.translate(_SMART_QUOTES)):
+        attempt = source
+        for repair in repairs:
+            attempt = repair(attempt)
+            try:
+                return json.loads(attempt, strict=False)
+            except json.JSONDecodeError as e:
+                error = error or e
+
+        # Single-quoted keys and strings are valid Python even when they aren't JSON
+        try:
+            return ast.literal_eval(source)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            pass
+    raise ValueError(f"invalid JSON in the response: {error}")
+
+
+def _as_list(value) -> List:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        # One point per line, without bullets or numbering
+        lines = [re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line) for line in value.splitlines()]
+        return [line.strip() for line in lines if line.strip()]
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _as_source(source) -> Dict[str, str]:
+    if isinstance(source, dict):
+        return {str(k): "" if v is None else str(v) for k, v in source.items()}
+    text = str(source)
+    url = re.search(r"https?://\S+", text)
+    return {"title": text, "url": url.group(0) if url else ""}
+
+
+def coerce_research_response(data: Any, query: str = "") -> ResearchResponse:
+    """Validate data as a ResearchResponse after fixing near misses in field types
+
+    Lists given as strings, sources given as plain strings and a missing
+    topic or tools list are repaired; a missing summary is not.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+    data = dict(data)
+    data["topic"] = str(data.get("topic") or query)
+    data["key_points"] = [str(point) for point in _as_list(data.get("key_points"))]
+    data["sources"] = [_as_source(source) for source in _as_list(data.get("sources"))]
+    data["tools_used"] = [str(tool) for tool in _as_list(data.get("tools_used"))]
+    return ResearchResponse.model_validate(data)
+
+
+def parse_research_response(output_text: str, query: str = "") -> ResearchResponse:
+    """Local, model-free parse of the agent's answer; raises ValueError when it can't be repaired"""
+    try:
+        return coerce_research_response(parse_json_tolerant(output_text), query)
+    except ValidationError as e:
+        raise ValueError(f"response does not match the schema: {e.error_count()} errors, "
+                         f"first: {e.errors()[0]['loc']} {e.errors()[0]['msg']}") from None
+
+
+async def finalize_research(output_text: str, query: str, llm=None) -> ResearchResponse:
+    """Parse the agent's answer, falling back to one schema-constrained re-ask of llm
+
+    The re-ask only reformats the finished answer, so a malformed reply costs
+    one short model call instead of the whole research run. Raises ValueError
+    when both the local repair and the re-ask fail.
+    """
+    try:
+        return parse_research_response(output_text, query)
+    except ValueError as e:
+        if llm is None:
+            raise
+        error = e
+
+    draft = output_text[:MAX_REASK_CHARS]
+    try:
+        structured_llm = llm.with_structured_output(ResearchResponse)
+        response = await structured_llm.ainvoke(REASK_PROMPT.format(query=query, error=error, draft=draft))
+    except Exception as e:
+        raise ValueError(f"{error}; re-asking the model failed: {e}") from None
+
+    if isinstance(response, ResearchResponse):
+        return response
+    return coerce_research_response(response, query)
@@ -1,15 +1,21 @@
-from langchain_community.tools import WikipediaQueryRun
-from langchain_community.utilities import WikipediaAPIWrapper
-from langchain.tools import Tool
 from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
+import asyncio
 import json
-import re
-import os
-import time
-import random
+import threading
 from urllib.parse import urlparse
+from fetcher import fetch_all
+from circuit_breaker import CircuitOpenError
+from page_cache import page_cache
+from http_client import http_client
+from pdf_extract import spool_pdf, extract_pdf_text_in_pool
+from search_client import search_client, format_search_results
+from arxiv_client import arxiv_client, is_arxiv_id
+from html_extract import extract_text as extract_html_text
+from context_packing import pack_sources
+from result_store import get_store
+from local_corpus import local_corpus
+from prefetcher import prefetcher
+from tracing import traced, record
 
 # Original tools
 def save_to_txt(data: str, filename: str = "research_output.txt"):
@@ -21,59 +27,34 @@ def save_to_txt(data: str, filename: str = "research_output.txt"):
         
     return f"Data successfully saved to {filename}"
 
-def save_to_json(data: dict, filename: str = "research_output.json"):
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    data["timestamp"] = timestamp
-    
-    # Create file if it doesn't exist
-    if not os.path.exists(filename):
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump([], f)
-    
-    # Read existing data
-    with open(filename, "r", encoding="utf-8") as f:
+def save_to_json(data: dict, filename: str = "research_output.jsonl"):
+    # The agent passes tool input as a string
+    if isinstance(data, str):
         try:
-            existing_data = json.load(f)
+            data = json.loads(data)
         except json.JSONDecodeError:
-            existing_data = []
+            pass
+    if not isinstance(data, dict):
+        data = {"data": data}
     
-    # Append new data
-    existing_data.append(data)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    data["timestamp"] = timestamp
     
-    # Write back to file
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(existing_data, f, indent=2)
+    # One appended line per save instead of rewriting the whole history
+    get_store(filename).append(data)
     
     return f"Data successfully saved to {filename}"
 
 # Enhanced Web Search Tools
+@traced
 def search_web(query: str, num_results: int = 5) -> str:
     """Search multiple search engines and aggregate results"""
     try:
-        # Import here to avoid dependency issues
-        from duckduckgo_search import DDGS
-        
-        results = []
-        
-        # DuckDuckGo search
-        with DDGS() as ddgs:
-            ddg_results = list(ddgs.text(query, max_results=num_results))
-            for result in ddg_results:
-                results.append({
-                    "title": result.get("title", ""),
-                    "snippet": result.get("body", ""),
-                    "url": result.get("href", ""),
-                    "source": "DuckDuckGo"
-                })
-        
-        # Format the results
-        formatted_results = ""
-        for i, result in enumerate(results, 1):
-            formatted_results += f"{i}. {result['title']}\n"
-            formatted_results += f"   URL: {result['url']}\n"
-            formatted_results += f"   Snippet: {result['snippet']}\n\n"
-        
-        return formatted_results
+        # Shared client, a query research_topic already ran is served from its cache
+        results = search_client.search(query, max_results=num_results)
+        # The agent usually scrapes the top hits next, start on them while the model reads these
+        prefetcher.schedule([hit["url"] for hit in results], scrape_webpage, "scrape", top_n=3)
+        return format_search_results(results)
     except ImportError:
         # Fallback to simpler implementation
         from langchain_community.tools import DuckDuckGoSearchRun
@@ -82,72 +63,96 @@ def search_web(query: str, num_results: int = 5) -> str:
     except Exception as e:
         return f"Error during web search: {str(e)}"
 
+# Extracted text is cached per tool and kept in the local full-text corpus
+def remember_text(url: str, kind: str, text: str):
+    page_cache.put_text(url, kind, text)
+    local_corpus.add(url, text, kind)
+
+# Cache-aware download shared by the fetch tools
+@traced
+def download_with_cache(url: str, timeout: int = 15) -> bytes:
+    """Return the body of url from the page cache, revalidating or downloading it when needed"""
+    raw = page_cache.get_raw(url)
+    if raw is not None:
+        record("cache_hits")
+        return raw
+    
+    # Ask the server whether a stale copy is still valid instead of downloading it again.
+    # http_client applies the per-domain rate limit and the circuit breaker.
+    try:
+        response = http_client.get(url, headers=page_cache.conditional_headers(url), timeout=timeout)
+    except CircuitOpenError:
+        record("short_circuits")
+        # The host is known to be failing, an expired copy beats an error
+        raw = page_cache.get_raw(url, allow_stale=True)
+        if raw is not None:
+            return raw
+        raise
+    if response.status_code == 304:
+        raw = page_cache.get_raw(url, allow_stale=True)
+        if raw is not None:
+            page_cache.mark_revalidated(url)
+            record("cache_revalidated")
+            return raw
+        # Cached body vanished in the meantime, fetch it unconditionally
+        response = http_client.get(url, timeout=timeout)
+    response.raise_for_status()
+    
+    page_cache.put_raw(url, response.content, response.headers)
+    record("bytes_downloaded", len(response.content))
+    return response.content
+
 # Improved web scraping tool
+@traced
 def scrape_webpage(url: str) -> str:
     """Scrape content from a webpage with improved error handling and rate limiting"""
     try:
-        # Rate limiting to be respectful to websites
-        time.sleep(1 + random.random())
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.5",
-            "Referer": "https://www.google.com/",
-            "DNT": "1"
-        }
-        
-        # Parse the domain from the URL
-        domain = urlparse(url).netloc
-        
-        # Add domain-specific headers/cookies for certain sites
-        if "medium.com" in domain:
-            headers["Cookie"] = "medium-tracking-id=123; uid=abc123"
-        elif "github.com" in domain:
-            headers["Accept"] = "application/json"
-            
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            script.extract()
-        
-        # Get text
-        text = soup.get_text(separator='\n', strip=True)
+        prefetched = prefetcher.claim(url, "scrape")
+        if prefetched is not None:
+            return prefetched
         
-        # Clean up text
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+        cached = page_cache.get_text(url, "scrape")
+        if cached is not None:
+            record("cache_hits")
+            return cached
         
-        # Add source information
-        text = f"Source URL: {url}\n\n" + text
+        # Browser and site-specific headers are applied by the shared HTTP client
+        raw = download_with_cache(url, timeout=15)
         
-        # Limit text length to prevent overwhelming the model
+        # Single pass that skips boilerplate tags and stops once the length limit is reached
+        header = f"Source URL: {url}\n\n"
         max_length = 10000
-        if len(text) > max_length:
-            text = text[:max_length] + "...[truncated]"
+        text, truncated = extract_html_text(raw, max_chars=max_length - len(header))
         
+        text = header + text
+        if truncated:
+            text += "...[truncated]"
+            record("truncations")
+        
+        remember_text(url, "scrape", text)
         return text
     except Exception as e:
         return f"Error scraping webpage {url}: {str(e)}"
 
 # Smart article extraction
+@traced
 def extract_article_content(url: str) -> str:
     """Extract main article content from a webpage using smarter extraction techniques"""
     try:
-        # Rate limiting
-        time.sleep(1 + random.random())
-        
         # Try to use more advanced extraction if available
         try:
             from newspaper import Article
+            from bs4 import UnicodeDammit
+            
+            cached = page_cache.get_text(url, "article")
+            if cached is not None:
+                record("cache_hits")
+                return cached
             
+            # Download through the shared client and cache, newspaper only parses
             article = Article(url)
-            article.download()
+            raw = download_with_cache(url, timeout=15)
+            article.download(input_html=UnicodeDammit(raw).unicode_markup)
             article.parse()
             
             # Get metadata
@@ -159,6 +164,7 @@ def extract_article_content(url: str) -> str:
             # Get content
             result += article.text
             
+            remember_text(url, "article", result)
             return result
         except ImportError:
             # Fallback to simpler extraction
@@ -166,24 +172,39 @@ def extract_article_content(url: str) -> str:
     except Exception as e:
         return f"Error extracting article content from {url}: {str(e)}"
 
+# Search everything fetched in earlier research before going to the network
+@traced
+def search_local_corpus(query: str) -> str:
+    """Search pages, articles and PDFs fetched in earlier research"""
+    try:
+        results = local_corpus.search(query, limit=5)
+        if not results:
+            return f"No previously fetched material matches '{query}'. Use the web research tools."
+        
+        formatted_results = f"Local Corpus Results ({len(results)} passages):\n\n"
+        for i, result in enumerate(results, 1):
+            fetched = datetime.fromtimestamp(result["fetched_at"]).strftime("%Y-%m-%d")
+            formatted_results += f"{i}. {result['title']}\n"
+            formatted_results += f"   URL: {result['url']}\n"
+            formatted_results += f"   Fetched: {fetched}\n"
+            passage = result["passage"]
+            formatted_results += f"   Passage: {passage[:1200] + '...' if len(passage) > 1200 else passage}\n\n"
+        return formatted_results
+    except Exception as e:
+        return f"Error searching local corpus: {str(e)}"
+
 # Multiple source research function
+@traced
 def research_topic(query: str) -> str:
     """Research a topic by gathering information from multiple sources"""
     try:
-        results = []
+        # Step 1: Get initial search results as structured hits
+        hits = search_client.search(query, max_results=10)
+        search_results = format_search_results(hits)
         
-        # Step 1: Get initial search results
-        from langchain_community.tools import DuckDuckGoSearchRun
-        search = DuckDuckGoSearchRun()
-        search_results = search.run(query)
-        
-        # Extract URLs from search results
-        urls = re.findall(r'https?://[^\s]+', search_results)
-        urls = [url.rstrip('.,;:)') for url in urls]
-        
-        # Only use first few valid URLs
+        # Only use first few valid URLs, the next ones are prefetched
         valid_urls = []
-        for url in urls:
+        for url in (hit["url"] for hit in hits):
             # Filter out certain domains
             domain = urlparse(url).netloc
             if (
@@ -195,68 +216,76 @@ def research_topic(query: str) -> str:
                 ".gov" not in domain               # Skip government sites for research
             ):
                 valid_urls.append(url)
-                if len(valid_urls) >= 3:
+                if len(valid_urls) >= 5:
                     break
+        valid_urls, next_urls = valid_urls[:3], valid_urls[3:]
         
         # Research message
         research_message = f"Researching: {query}\n\n"
         research_message += "Sources consulted:\n"
         
-        # Scrape the valid URLs
-        source_texts = []
-        for i, url in enumerate(valid_urls, 1):
-            try:
-                # Use smarter extraction
-                article_content = extract_article_content(url)
-                source_texts.append(f"Source {i}: {url}\n\n{article_content}")
+        # Scrape the valid URLs in parallel, results keep the search ranking order
+        sources = []
+        fetched = fetch_all(valid_urls, extract_article_content)
+        for i, (url, article_content, error) in enumerate(fetched, 1):
+            if error is None:
+                sources.append((f"Source {i}: {url}", article_content))
                 research_message += f"{i}. {url}\n"
-            except Exception as e:
-                research_message += f"{i}. {url} - Error: {str(e)}\n"
+            else:
+                research_message += f"{i}. {url} - Error: {error}\n"
         
         # Add search results too
-        source_texts.append(f"Search Results:\n{search_results}")
+        sources.append(("Search Results:", search_results))
+        prefetcher.schedule(next_urls, scrape_webpage, "scrape", top_n=2)
         
-        combined_research = research_message + "\n\n" + "\n\n---\n\n".join(source_texts)
-        
-        # Limit total length
-        max_length = 20000
-        if len(combined_research) > max_length:
-            combined_research = combined_research[:max_length] + "...[truncated]"
+        # Share the token budget across sources, keeping their most relevant passages
+        combined_research = research_message + "\n\n" + pack_sources(query, sources, token_budget=5000)
         
         return combined_research
     except Exception as e:
         return f"Error during topic research: {str(e)}"
 
 # Academic Search Tools
+@traced
 def search_arxiv(query: str, max_results: int = 5) -> str:
-    """Search for academic papers on arXiv"""
+    """Search for academic papers on arXiv, several queries or arXiv IDs can be separated with ';'"""
     try:
+        # Fail with a clear message before touching the index if the library is missing
         import arxiv
         
-        search = arxiv.Search(
-            query=query,
-            max_results=max_results,
-            sort_by=arxiv.SortCriterion.Relevance
-        )
+        terms = [term.strip() for term in query.split(";") if term.strip()]
+        paper_ids = [term for term in terms if is_arxiv_id(term)]
+        queries = [term for term in terms if not is_arxiv_id(term)]
+        
+        # Known ids come from the local index, the rest in one batched request
+        sections = []
+        if paper_ids:
+            papers = arxiv_client.get_papers(paper_ids)
+            sections.append((", ".join(paper_ids), list(papers.values()), None))
         
-        results = []
-        for paper in search.results():
-            results.append({
-                "title": paper.title,
-                "authors": [author.name for author in paper.authors],
-                "summary": paper.summary[:300] + "..." if len(paper.summary) > 300 else paper.summary,
-                "url": paper.pdf_url,
-                "published": paper.published.strftime("%Y-%m-%d")
-            })
+        # Queries run concurrently under the shared arXiv rate limit
+        for search_query, papers, error in arxiv_client.search_many(queries, max_results=max_results):
+            sections.append((search_query, papers, error))
+            if papers:
+                # The agent usually reads the top papers next, start extracting them now
+                prefetcher.schedule([paper["pdf_url"] for paper in papers], extract_text_from_pdf_url, "pdf", top_n=2)
         
         # Format results
         formatted_results = "ArXiv Research Results:\n\n"
-        for i, result in enumerate(results, 1):
-            formatted_results += f"{i}. {result['title']}\n"
-            formatted_results += f"   Authors: {', '.join(result['authors'])}\n"
-            formatted_results += f"   Published: {result['published']}\n"
-            formatted_results += f"   URL: {result['url']}\n"
-            formatted_results += f"   Summary: {result['summary']}\n\n"
+        for heading, papers, error in sections:
+            if len(sections) > 1:
+                formatted_results += f"Results for: {heading}\n\n"
+            if error:
+                formatted_results += f"Error searching arXiv: {error}\n\n"
+                continue
+            for i, paper in enumerate(papers, 1):
+                summary = paper["summary"][:300] + "..." if len(paper["summary"]) > 300 else paper["summary"]
+                formatted_results += f"{i}. {paper['title']}\n"
+                formatted_results += f"   arXiv ID: {paper['id']}\n"
+                formatted_results += f"   Authors: {', '.join(paper['authors'])}\n"
+                formatted_results += f"   Published: {paper['published']}\n"
+                formatted_results += f"   URL: {paper['pdf_url']}\n"
+                formatted_results += f"   Summary: {summary}\n\n"
         
         return formatted_results
     except ImportError:
@@ -265,92 +294,156 @@ def search_arxiv(query: str, max_results: int = 5) -> str:
         return f"Error searching arXiv: {str(e)}"
 
 # PDF extraction tool
+@traced
 def extract_text_from_pdf_url(url: str) -> str:
     """Extract text from a PDF at the given URL"""
     try:
-        import io
+        # Fail before downloading anything if the parser is missing
         import PyPDF2
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        pdf_file = io.BytesIO(response.content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        text = ""
-        max_pages = min(20, len(pdf_reader.pages))
+        prefetched = prefetcher.claim(url, "pdf")
+        if prefetched is not None:
+            return prefetched
         
-        for page_num in range(max_pages):
-            page = pdf_reader.pages[page_num]
-            text += page.extract_text() + "\n\n"
+        cached = page_cache.get_text(url, "pdf")
+        if cached is not None:
+            record("cache_hits")
+            return cached
         
-        # Add source
-        text = f"Source PDF: {url}\n\n" + text
-        
-        # Limit text length
+        # Stream to disk, then parse page by page in a worker process until the budget is spent
+        header = f"Source PDF: {url}\n\n"
         max_length = 10000
-        if len(text) > max_length:
-            text = text[:max_length] + "...[truncated]"
+        pdf_path = spool_pdf(url, timeout=10)
+        text, truncated = extract_pdf_text_in_pool(pdf_path, max_pages=20, max_chars=max_length - len(header))
+        
+        text = header + text
+        if truncated:
+            text += "...[truncated]"
+            record("truncations")
         
+        remember_text(url, "pdf", text)
         return text
     except ImportError:
         return "Error: PyPDF2 library not installed. Run 'pip install PyPDF2' to enable PDF extraction."
     except Exception as e:
         return f"Error extracting PDF content: {str(e)}"
 
-# Define all tools
-save_tool = Tool(
-    name="save_text_to_file",
-    func=save_to_txt,
-    description="Saves structured research data to a text file.",
-)
+# Wikipedia search, the wrapper is created on the first lookup
+_wiki_search = None
+
+def search_wikipedia(query: str) -> str:
+    """Search Wikipedia for general background information"""
+    global _wiki_search
+    if _wiki_search is None:
+        from langchain_community.tools import WikipediaQueryRun
+        from langchain_community.utilities import WikipediaAPIWrapper
+        
+        api_wrapper = WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=2000)
+        _wiki_search = WikipediaQueryRun(api_wrapper=api_wrapper)
+    return _wiki_search.run(query)
 
-save_json_tool = Tool(
-    name="save_json_to_file",
-    func=save_to_json,
-    description="Saves structured research data to a JSON file.",
-)
+# Async variants let the agent run several tool calls from one turn concurrently
+def make_async(func):
+    """Wrap a blocking tool function so it runs in a worker thread when awaited"""
+    async def run_in_thread(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return run_in_thread
 
-advanced_search_tool = Tool(
-    name="search_web",
-    func=search_web,
-    description="Search the web for up-to-date information on any topic.",
-)
+# Define all tools, built on first use so importing this module stays cheap
+_tools = None
+_tools_lock = threading.Lock()
 
-web_scrape_tool = Tool(
-    name="scrape_webpage",
-    func=scrape_webpage,
-    description="Scrape and extract content from a specific webpage URL.",
-)
+def get_tools() -> dict:
+    """All agent tools keyed by their variable name"""
+    global _tools
+    with _tools_lock:
+        if _tools is None:
+            _tools = _build_tools()
+        return _tools
 
-article_extract_tool = Tool(
-    name="extract_article",
-    func=extract_article_content,
-    description="Extract main article content, title, and metadata from a webpage URL.",
-)
+def _build_tools() -> dict:
+    from langchain.tools import Tool
+    
+    save_tool = Tool(
+        name="save_text_to_file",
+        func=save_to_txt,
+        coroutine=make_async(save_to_txt),
+        description="Saves structured research data to a text file.",
+    )
+
+    save_json_tool = Tool(
+        name="save_json_to_file",
+        func=save_to_json,
+        coroutine=make_async(save_to_json),
+        description="Appends structured research data as one JSON line to a JSONL file.",
+    )
+
+    advanced_search_tool = Tool(
+        name="search_web",
+        func=search_web,
+        coroutine=make_async(search_web),
+        description="Search the web for up-to-date information on any topic.",
+    )
+
+    web_scrape_tool = Tool(
+        name="scrape_webpage",
+        func=scrape_webpage,
+        coroutine=make_async(scrape_webpage),
+        description="Scrape and extract content from a specific webpage URL.",
+    )
 
-pdf_extract_tool = Tool(
-    name="extract_pdf",
-    func=extract_text_from_pdf_url,
-    description="Extract text from a PDF at the given URL.",
-)
+    article_extract_tool = Tool(
+        name="extract_article",
+        func=extract_article_content,
+        coroutine=make_async(extract_article_content),
+        description="Extract main article content, title, and metadata from a webpage URL.",
+    )
 
-arxiv_search_tool = Tool(
-    name="search_academic_papers",
-    func=search_arxiv,
-    description="Search for academic papers on arXiv.",
-)
+    pdf_extract_tool = Tool(
+        name="extract_pdf",
+        func=extract_text_from_pdf_url,
+        coroutine=make_async(extract_text_from_pdf_url),
+        description="Extract text from a PDF at the given URL.",
+    )
 
-multi_source_research_tool = Tool(
-    name="research_topic",
-    func=research_topic,
-    description="Conduct comprehensive research on a topic by gathering information from multiple web sources."
-)
+    arxiv_search_tool = Tool(
+        name="search_academic_papers",
+        func=search_arxiv,
+        coroutine=make_async(search_arxiv),
+        description="Search for academic papers on arXiv. Separate several queries or arXiv IDs with ';' to run them in one call.",
+    )
 
-# Deprioritized Wikipedia tool
-api_wrapper = WikipediaAPIWrapper(top_k_results=1, doc_content_chars_max=2000)
-wiki_tool = Tool(
-    name="wikipedia_search",
-    func=WikipediaQueryRun(api_wrapper=api_wrapper).run,
-    description="Search Wikipedia only if you need general background information.",
-)
\ No newline at end of file
+    multi_source_research_tool = Tool(
+        name="research_topic",
+        func=research_topic,
+        coroutine=make_async(research_topic),
+        description="Conduct comprehensive research on a topic by gathering information from multiple web sources."
+    )
+
+    local_corpus_tool = Tool(
+        name="search_local_corpus",
+        func=search_local_corpus,
+        coroutine=make_async(search_local_corpus),
+        description="Search the pages, articles and PDFs fetched in earlier research. Fast and offline, try it before the web tools.",
+    )
+
+    # Deprioritized Wikipedia tool
+    wiki_tool = Tool(
+        name="wikipedia_search",
+        func=search_wikipedia,
+        coroutine=make_async(search_wikipedia),
+        description="Search Wikipedia only if you need general background information.",
+    )
+    
+    return {
+        "save_tool": save_tool,
+        "save_json_tool": save_json_tool,
+        "advanced_search_tool": advanced_search_tool,
+        "web_scrape_tool": web_scrape_tool,
+        "article_extract_tool": article_extract_tool,
+        "pdf_extract_tool": pdf_extract_tool,
+        "arxiv_search_tool": arxiv_search_tool,
+        "multi_source_research_tool": multi_source_research_tool,
+        "local_corpus_tool": local_corpus_tool,
+        "wiki_tool": wiki_tool,
+    }
\ No newline at end of file
@@ -0,0 +1,197 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+_current_tracer: ContextVar[Optional["Tracer"]] = ContextVar("current_tracer", default=None)
+_current_span: ContextVar[Optional[dict]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Collects timed spans for one research run
+
+    Spans come from tracing_callbacks.TracingCallbackHandler (agent chain,
+    LLM calls, tool calls) and from @traced functions in tools.py, which also
+    accumulate counters such as bytes_downloaded, cache_hits and truncations
+    via record().
+    """
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[dict] = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: str, parent_id: Optional[str] = None, **attributes) -> dict:
+        span = {
+            "trace_id": self.trace_id,
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent_id,
+            "name": name,
+            "kind": kind,
+            "start": time.time(),
+            "end": None,
+            "duration": None,
+            "status": "ok",
+            "error": None,
+            "attributes": dict(attributes),
+        }
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def end_span(self, span: dict, error: Optional[str] = None, **attributes):
+        with self._lock:
+            span["end"] = time.time()
+            span["duration"] = span["end"] - span["start"]
+            span["attributes"].update(attributes)
+            if error:
+                span["status"] = "error"
+                span["error"] = error[:500]
+
+    def add(self, span: dict, name: str, value: float = 1):
+        with self._lock:
+            span["attributes"][name] = span["attributes"].get(name, 0) + value
+
+    # Export
+    def export_jsonl(self, path: str):
+        """Append every span as one JSON line"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            for span in self.spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+    def to_otlp(self) -> dict:
+        """Spans in the OpenTelemetry OTLP/JSON layout"""
+        def value(v):
+            if isinstance(v, bool):
+                return {"boolValue": v}
+            if isinstance(v, int):
+                return {"intValue": str(v)}
+            if isinstance(v, float):
+                return {"doubleValue": v}
+            return {"stringValue": str(v)}
+
+        spans = []
+        for span in self.spans:
+            attributes = dict(span["attributes"], kind=span["kind"])
+            spans.append({
+                "traceId": span["trace_id"],
+                "spanId": span["span_id"],
+                "parentSpanId": span["parent_id"] or "",
+                "name": span["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(int(span["start"] * 1e9)),
+                "endTimeUnixNano": str(int((span["end"] or span["start"]) * 1e9)),
+                "attributes": [{"key": k, "value": value(v)} for k, v in attributes.items()],
+                "status": {"code": 2, "message": span["error"]} if span["status"] == "error" else {"code": 1},
+            })
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "ai-research-assistant"}}]},
+            "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}],
+        }]}
+
+    # Reporting
+    def summary(self) -> Dict[str, Any]:
+        finished = [s for s in self.spans if s["duration"] is not None]
+        wall = max([s["end"] for s in finished], default=time.time()) - self.started
+
+        llm = [s for s in finished if s["kind"] == "llm"]
+        tools = defaultdict(list)
+        for span in finished:
+            if span["kind"] == "tool":
+                tools[span["name"]].append(span["duration"])
+
+        totals = defaultdict(float)
+        for span in finished:
+            if span["kind"] == "function":
+                for key, amount in span["attributes"].items():
+                    if isinstance(amount, (int, float)) and not isinstance(amount, bool):
+                        totals[key] += amount
+
+        return {
+            "trace_id": self.trace_id,
+            "wall_time": round(wall, 3),
+            "llm_calls": len(llm),
+            "llm_time": round(sum(s["duration"] for s in llm), 3),
+            "input_tokens": sum(s["attributes"].get("input_tokens", 0) for s in llm),
+            "output_tokens": sum(s["attributes"].get("output_tokens", 0) for s in llm),
+            "tools": {
+                name: {"calls": len(d), "total": round(sum(d), 3), "max": round(max(d), 3)}
+                for name, d in sorted(tools.items(), key=lambda item: -sum(item[1]))
+            },
+            "counters": dict(totals),
+            "errors": sum(1 for s in finished if s["status"] == "error"),
+        }
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        wall = summary["wall_time"] or 1e-9
+
+        def share(seconds):
+            return f"{seconds:.2f}s ({seconds / wall:.0%})"
+
+        lines = [
+            f"Trace {summary['trace_id']}: {summary['wall_time']:.2f}s wall",
+            f"  LLM: {summary['llm_calls']} calls, {share(summary['llm_time'])}, "
+            f"{summary['input_tokens']} input / {summary['output_tokens']} output tokens",
+        ]
+        tool_time = 0.0
+        for name, stats in summary["tools"].items():
+            lines.append(f"  {name}: {stats['calls']} calls, {share(stats['total'])}, max {stats['max']:.2f}s")
+            tool_time += stats["total"]
+        # Concurrent tool calls overlap, so this is a lower bound on framework/idle time
+        lines.append(f"  Other: {share(max(0.0, wall - summary['llm_time'] - tool_time))}")
+        counters = summary["counters"]
+        lines.append(
+            f"  Downloaded {counters.get('bytes_downloaded', 0) / 1024:.0f} KB, "
+            f"{int(counters.get('cache_hits', 0))} cache hits, "
+            f"{int(counters.get('truncations', 0))} truncations, {summary['errors']} errors"
+        )
+        return "\n".join(lines)
+
+
+# Function-level instrumentation
+def start_trace() -> Tracer:
+    """Make a new Tracer current for this context (and tasks/threads started from it)"""
+    tracer = Tracer()
+    _current_tracer.set(tracer)
+    return tracer
+
+
+def traced(func):
+    """Record a span around func when a trace is active, tool error strings mark it failed"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tracer = _current_tracer.get()
+        if tracer is None:
+            return func(*args, **kwargs)
+
+        parent = _current_span.get()
+        span = tracer.start_span(func.__name__, "function", parent_id=parent["span_id"] if parent else None)
+        token = _current_span.set(span)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            tracer.end_span(span, error=str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+
+        error = result if isinstance(result, str) and result.startswith("Error") else None
+        tracer.end_span(span, error=error)
+        return result
+    return wrapper
+
+
+def record(name: str, value: float = 1):
+    """Add value to a counter on the innermost traced function"""
+    tracer = _current_tracer.get()
+    span = _current_span.get()
+    if tracer is not None and span is not None:
+        tracer.add(span, name, value)
@@ -0,0 +1,70 @@
+"""LangChain callback handler for tracing, kept apart so tracing.py imports without LangChain"""
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tracing import Tracer
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler turning chain, LLM and tool events into spans"""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._spans: Dict[Any, dict] = {}
+        self._iteration = 0
+
+    def _start(self, run_id, parent_run_id, name: str, kind: str, **attributes):
+        parent = self._spans.get(parent_run_id)
+        self._spans[run_id] = self.tracer.start_span(
+            name, kind, parent_id=parent["span_id"] if parent else None, **attributes
+        )
+
+    def _end(self, run_id, error: Optional[BaseException] = None, **attributes):
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            self.tracer.end_span(span, error=str(error) if error else None, **attributes)
+
+    # Chains (the agent executor itself and its runnables)
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self._start(run_id, None, "agent_executor", "agent")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id, iterations=self._iteration)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error, iterations=self._iteration)
+
+    # LLM calls, one per agent iteration
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._iteration += 1
+        self._start(run_id, parent_run_id, "llm", "llm", iteration=self._iteration)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._iteration += 1
+        self._start(run_id, parent_run_id, "llm", "llm", iteration=self._iteration)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                message_usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                for key in ("input_tokens", "output_tokens"):
+                    usage[key] = usage.get(key, 0) + message_usage.get(key, 0)
+        self._end(run_id, **usage)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
+
+    # Tool calls
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, parent_run_id, name, "tool", input=str(input_str)[:200])
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        text = str(output)
+        self._end(run_id, error=text if text.startswith("Error") else None, output_chars=len(text))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=error)
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+
+from job_queue import get_queue
+
+
+def _worker_name(pid: int) -> str:
+    return f"pid-{pid}"
+
+
+async def _work(queue, worker: str, semaphore: asyncio.Semaphore, stop_event, drain: bool, poll_interval: float):
+    """Claim and research jobs until stopped, or until the queue is empty with drain"""
+    from batch import research_one
+
+    # Queue calls can wait on SQLite locks held by other workers, keep them off the event loop
+    while not stop_event.is_set():
+        job = await asyncio.to_thread(queue.claim, worker)
+        if job is None:
+            if drain and await asyncio.to_thread(queue.pending) == 0:
+                return
+            await asyncio.sleep(poll_interval)
+            continue
+        if stop_event.is_set():
+            # Shutdown began while claiming, hand the job back untouched
+            await asyncio.to_thread(queue.release, job["id"])
+            return
+
+        record = await research_one(job["query"], semaphore)
+        if "error" in record:
+            retry = await asyncio.to_thread(queue.fail, job["id"], record["error"], record)
+            status = "retrying" if retry else "failed"
+        else:
+            await asyncio.to_thread(queue.complete, job["id"], record)
+            status = "ok"
+        print(
+            f"[{worker}] job {job['id']} {status} (attempt {job['attempt']}) in {record['latency']:.2f}s: {job['query'][:80]}",
+            file=sys.stderr,
+        )
+
+
+def worker_main(queue_path: str, stop_event, concurrency: int, drain: bool, poll_interval: float):
+    """Entry point of one worker process: build the agent stack once, then serve jobs"""
+    # The parent handles Ctrl+C and tells the workers to stop through stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from main import get_agent_executor, get_llm
+    from prefetcher import prefetcher
+
+    # Warm the agent stack before the first job, every job after it reuses it
+    get_agent_executor()
+    get_llm()
+
+    queue = get_queue(queue_path)
+    worker = _worker_name(os.getpid())
+
+    async def serve():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(
+            _work(queue, worker, semaphore, stop_event, drain, poll_interval) for _ in range(concurrency)
+        ))
+
+    try:
+        asyncio.run(serve())
+    finally:
+        prefetcher.shutdown()
+
+
+def run_pool(queue_path: str, workers: int, concurrency: int = 2, drain: bool = False, poll_interval: float = 1.0) -> dict:
+    """Run worker processes until they are stopped (Ctrl+C/SIGTERM) or, with drain, the queue is empty
+
+    The first Ctrl+C lets every worker finish the job it is on, a second one
+    terminates them; their unfinished jobs go back to the queue either way.
+    """
+    # Workers share one token bucket per domain instead of each being polite on its own
+    os.environ.setdefault("RATE_LIMIT_STATE", ".rate_limit.sqlite")
+
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    processes = [
+        context.Process(
+            target=worker_main,
+            args=(queue_path, stop_event, concurrency, drain, poll_interval),
+            name=f"research-worker-{i}",
+        )
+        for i in range(workers)
+    ]
+
+    def handle_signal(signum, frame):
+        if not stop_event.is_set():
+            print("Stopping after the running jobs, press Ctrl+C again to abort them...", file=sys.stderr)
+            stop_event.set()
+        else:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+    previous = {sig: signal.signal(sig, handle_signal) for sig in (signal.SIGINT, signal.SIGTERM)}
+    queue = get_queue(queue_path)
+    start_time = time.time()
+    done_before = queue.stats()["done"]
+    try:
+        for process in processes:
+            process.start()
+        print(f"Started {workers} workers with {concurrency} jobs each on {queue_path}", file=sys.stderr)
+
+        for process in processes:
+            while process.is_alive():
+                process.join(timeout=1)
+            if process.exitcode != 0:
+                print(f"{process.name} exited with code {process.exitcode}", file=sys.stderr)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+    # Jobs of workers that were terminated or crashed can run again right away
+    released = sum(queue.release_worker(_worker_name(process.pid)) for process in processes if process.pid)
+
+    elapsed = time.time() - start_time
+    stats = queue.stats()
+    completed = stats["done"] - done_before
+    return {
+        "workers": workers,
+        "completed": completed,
+        "released": released,
+        "wall_time": round(elapsed, 3),
+        "throughput_per_minute": round(completed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "queue": stats,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Research queued queries with a pool of worker processes.")
+    parser.add_argument("--queue", default=None, help="SQLite job queue file (default: JOB_QUEUE_PATH or .job_queue.sqlite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue the queries of a JSONL file, or - for stdin")
+    submit.add_argument("input")
+    submit.add_argument("--max-attempts", type=int, default=3, help="Attempts per job before it is marked failed")
+
+    run = commands.add_parser("run", help="Start the worker pool")
+    run.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 2, help="Number of worker processes")
+    run.add_argument("-c", "--concurrency", type=int, default=2, help="Jobs each worker researches at once")
+    run.add_argument("--drain", action="store_true", help="Exit once no jobs are queued or running")
+
+    commands.add_parser("status", help="Show how many jobs are in each state")
+
+    results = commands.add_parser("results", help="Write finished jobs and their results as JSONL")
+    results.add_argument("-o", "--output", default="-", help="Output file, - for stdout")
+    results.add_argument("--since", type=float, default=0, help="Only jobs finished after this Unix time")
+
+    args = parser.parse_args(argv)
+    queue_path = args.queue or os.getenv("JOB_QUEUE_PATH", ".job_queue.sqlite")
+
+    if args.command == "submit":
+        from batch import read_queries
+
+        queries = []
+        for query, error in read_queries(args.input):
+            if error:
+                print(f"Skipped: {error}", file=sys.stderr)
+            else:
+                queries.append(query)
+        ids = get_queue(queue_path).submit(queries, max_attempts=args.max_attempts)
+        print(f"Queued {len(ids)} jobs", file=sys.stderr)
+    elif args.command == "run":
+        summary = run_pool(queue_path, args.workers, args.concurrency, drain=args.drain)
+        print(json.dumps(summary, indent=2))
+    elif args.command == "status":
+        print(json.dumps(get_queue(queue_path).stats(), indent=2))
+    elif args.command == "results":
+        out = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+        try:
+            for job in get_queue(queue_path).finished(since=args.since):
+                out.write(json.dumps(job) + "\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+
+if __name__ == "__main__":
+    main()